@@ -0,0 +1,70 @@
+"""
+Canonical amenity keys.
+
+Sources label the same amenity differently ("Gym", "Fitness Center",
+"fitness"), so amenities are stored as canonical snake_case keys and mapped
+back to display labels for the frontend.
+"""
+
+import re
+from typing import Iterable, List
+
+# Lowercased source labels that mean the same amenity
+AMENITY_ALIASES = {
+    'gym': 'fitness_center',
+    'fitness': 'fitness_center',
+    'fitness center': 'fitness_center',
+    'gym access': 'fitness_center',
+    'wi-fi': 'wifi',
+    'internet': 'wifi',
+    'study': 'study_space',
+    'study rooms': 'study_space',
+    'study lounge': 'study_space',
+    'study lounges': 'study_space',
+    'study spaces': 'study_space',
+    'furnished options': 'furnished',
+    'volleyball court': 'volleyball',
+    'sand volleyball': 'volleyball',
+    'beach volleyball': 'volleyball',
+    'dining hall': 'dining',
+    'shuttle service': 'shuttle',
+}
+
+# Display labels that differ from the default title-casing of the key
+AMENITY_LABELS = {
+    'wifi': 'WiFi',
+    'pet_friendly': 'Pet-Friendly',
+    'budget_friendly': 'Budget-Friendly',
+}
+
+CANONICAL_KEY = re.compile(r'^[a-z0-9]+(?:_[a-z0-9]+)*$')
+
+
+def normalize_amenity(label: str) -> str:
+    """Map a source label such as 'Rooftop Pool' or 'Gym' to its canonical key.
+    
+    Raises TypeError for a label that is not a string, so loaders reject the
+    record rather than fail the whole load.
+    """
+    if not isinstance(label, str):
+        raise TypeError(f"Amenity label must be a string, got {type(label).__name__}")
+    cleaned = ' '.join(label.strip().lower().split())
+    if cleaned in AMENITY_ALIASES:
+        return AMENITY_ALIASES[cleaned]
+    return re.sub(r'[^a-z0-9]+', '_', cleaned).strip('_')
+
+
+def normalize_amenities(labels: Iterable[str]) -> List[str]:
+    """Normalize a list of labels to unique canonical keys, keeping first-seen order"""
+    keys = []
+    for label in labels or []:
+        key = normalize_amenity(label)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def amenity_label(key: str) -> str:
+    """Display label for a canonical key"""
+    return AMENITY_LABELS.get(key, key.replace('_', ' ').title())
+
@@ -1,8 +1,25 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Body, Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Optional
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Iterator, List, Dict, Optional
+import csv
+import io
+import json
 import os
-from database import HousingDatabase
+import time
+import metrics
+from amenities import amenity_label, normalize_amenities
+from database import (ExportsBusy, HousingDatabase, DEFAULT_PAGE_SIZE, DEFAULT_PRICE_BUCKETS, EXPORT_FETCH_SIZE,
+                      MAX_BATCH_IDS, MAX_PAGE_SIZE, SORT_ORDERS)
+from async_database import AsyncHousingDatabase
+from prepared_statements import PreparedStatements
+from query_cache import QueryCache
+from single_flight import SingleFlight
+from snapshot import SnapshotStore
+from http_cache import conditional_response
+from refresh_jobs import RefreshInProgress, RefreshJobManager
+from request_timing import start_request
 
 app = FastAPI(title="Gainesville Housing API", version="1.0.0")
 
@@ -15,165 +32,426 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    """Record per-route latency, status and in-flight metrics, and report database
+    and total time for each request in a Server-Timing header"""
+    timing = start_request()
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Label by route template; unmatched paths share one series
+        route = request.scope.get('route')
+        labels = {'method': request.method, 'route': getattr(route, 'path', 'unmatched')}
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - timing.started, **labels)
+        metrics.HTTP_REQUESTS.inc(status=status, **labels)
+    response.headers['Server-Timing'] = timing.server_timing()
+    return response
+
 # Initialize database
-db = HousingDatabase()
+db = HousingDatabase(cache=QueryCache.from_env(), snapshots=SnapshotStore.from_env(),
+                     single_flight=SingleFlight.from_env(), statements=PreparedStatements.from_env())
+adb = AsyncHousingDatabase(db)
+refresh_jobs = RefreshJobManager(db)
+
+def database_metrics():
+    """Connection pool, query cache, single-flight and prepared statement counters, read at scrape time"""
+    for prefix, stats in (('housing_db_pool', db.pool_stats()), ('housing_query_cache', db.cache_stats()),
+                          ('housing_single_flight', db.single_flight_stats()),
+                          ('housing_prepared', db.prepared_stats())):
+        for key, value in (stats or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}_{key}", 'gauge', f"{prefix.replace('_', ' ')} {key.replace('_', ' ')}", value
+
+metrics.register_collector(database_metrics)
+
+def transform_housing(housing: Dict) -> Dict:
+    """Transform a housing row for frontend compatibility"""
+    return {
+        'id': housing['id'],
+        'name': housing['name'],
+        'location': housing['location'],
+        'price': housing['price_range'],
+        'priceValue': housing['avg_price'],
+        'rating': float(housing['rating']),
+        'members': housing['member_count'],
+        'image': housing['image_url'],
+        'tags': [amenity_label(key) for key in housing['amenities'] or []],
+        'busRoute': housing['bus_routes'][0] if housing['bus_routes'] else '',
+        'area': housing['distance_to_campus'],
+        'housingType': housing['housing_type'],
+        'internationalFriendly': housing['is_international_friendly'],
+        'description': housing['description'],
+        'latitude': housing['latitude'],
+        'longitude': housing['longitude'],
+        # Only set when the request passed near=
+        'distanceMiles': round(housing['distance'], 2) if housing.get('distance') is not None else None
+    }
+
+EXPORT_MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+SORT_PATTERN = f"^({'|'.join(SORT_ORDERS)})$"
+SORT_DESCRIPTION = ("rating (default; full-text searches rank matches first), price_asc, price_desc, members, "
+                    "newest, or distance: nearest to near first")
+
+def export_chunks(rows: Iterator[Dict], fmt: str, chunk_rows: int) -> Iterator[str]:
+    """Transform and serialize streamed rows, yielding chunk_rows lines at a time"""
+    buffer = io.StringIO()
+    writer = None
+    written = 0
+    for housing in rows:
+        item = transform_housing(housing)
+        if fmt == 'csv':
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(item))
+                writer.writeheader()
+            writer.writerow({**item, 'tags': '; '.join(item['tags'])})
+        else:
+            buffer.write(json.dumps(item) + '\n')
+        
+        written += 1
+        if written % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+class ExportResponse(StreamingResponse):
+    """Streaming export that closes its row stream however the response ends.
+    
+    Starlette abandons the body iterator when the client disconnects, which
+    would keep the stream's pooled connection and export slot until garbage
+    collection got to it.
+    """
+    
+    def __init__(self, rows: Iterator[Dict], content: Iterator[str], **kwargs):
+        super().__init__(content, **kwargs)
+        self.rows = rows
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await run_in_threadpool(self.rows.close)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     try:
+        db.open_pool()
         db.init_tables()
         print("Database initialized successfully")
     except Exception as e:
         print(f"Database initialization failed: {str(e)}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop any running refresh, then release database workers and pooled connections"""
+    refresh_jobs.shutdown()
+    adb.shutdown()
+    db.close_pool()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {"message": "Gainesville Housing API", "version": "1.0.0"}
 
-@app.get("/api/housing")
-async def get_housing(
+@app.get("/api/health")
+async def health():
+    """Health check with connection pool, query cache, single-flight, prepared statement and snapshot metrics"""
+    return {"status": "ok", "pool": db.pool_stats(), "cache": db.cache_stats(),
+            "single_flight": db.single_flight_stats(), "prepared": db.prepared_stats(),
+            "snapshot": db.snapshot_stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request, database and scraper metrics in the Prometheus text format"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def check_not_modified(request: Request, response: Response, endpoint: str) -> Optional[Response]:
+    """
+    Answer If-None-Match / If-Modified-Since from the data version alone.
+    Returns a 304 response, or None after setting validators on the response.
+    """
+    version, changed_at = await adb.data_state()
+    not_modified, headers = conditional_response(request, endpoint, version, changed_at)
+    response.headers.update(headers)
+    return not_modified
+
+def housing_filters(
     housing_type: Optional[str] = Query(None, description="Filter by housing type: off_campus, on_campus"),
     international_friendly: Optional[bool] = Query(None, description="Filter by international student friendly"),
     max_price: Optional[int] = Query(None, description="Maximum price filter"),
     min_price: Optional[int] = Query(None, description="Minimum price filter"),
-    search: Optional[str] = Query(None, description="Search in name, location, or description"),
+    search: Optional[str] = Query(None, description="Full-text search in name, location, or description (prefix matching, ranked)"),
     amenities: Optional[str] = Query(None, description="Filter by amenities (comma-separated)"),
+    match: str = Query('any', pattern='^(any|all)$', description="Amenity match: any listed or all listed"),
+    near: Optional[str] = Query(None, description="Point to measure distance from, as 'lat,lon'"),
+    radius: Optional[float] = Query(None, gt=0, le=100, description="Only listings within this many miles of near"),
     id: Optional[int] = Query(None, description="Filter by specific housing ID")
+) -> Dict:
+    """Collect the housing filter query parameters shared by list and stats endpoints"""
+    filters = {}
+    
+    if housing_type:
+        filters['housing_type'] = housing_type
+    
+    if international_friendly is not None:
+        filters['international_friendly'] = international_friendly
+    
+    if max_price:
+        filters['max_price'] = max_price
+    
+    if min_price:
+        filters['min_price'] = min_price
+    
+    if search:
+        filters['search'] = search
+    
+    if amenities:
+        filters['amenities'] = normalize_amenities(amenities.split(','))
+        if match == 'all':
+            filters['amenity_match'] = 'all'
+    
+    if near:
+        try:
+            lat, lon = (float(part) for part in near.split(','))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="near must be 'lat,lon'")
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise HTTPException(status_code=400, detail="near is out of range")
+        filters['near'] = (lat, lon)
+    
+    if radius:
+        if not near:
+            raise HTTPException(status_code=400, detail="radius requires near")
+        filters['radius'] = radius
+    
+    if id:
+        filters['id'] = id
+    
+    return filters
+
+@app.get("/api/housing")
+async def get_housing(
+    request: Request,
+    response: Response,
+    filters: Dict = Depends(housing_filters),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    total: str = Query('estimate', pattern='^(exact|estimate|none)$', description="Total count: exact, estimate or none"),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description=SORT_DESCRIPTION)
 ):
     """
-    Get housing listings with optional filters
+    Get a page of housing listings with optional filters
     """
     try:
-        filters = {}
+        if sort:
+            filters = {**filters, 'sort': sort}
         
-        if housing_type:
-            filters['housing_type'] = housing_type
+        not_modified = await check_not_modified(request, response, 'housing_list')
+        if not_modified:
+            return not_modified
         
-        if international_friendly is not None:
-            filters['international_friendly'] = international_friendly
-        
-        if max_price:
-            filters['max_price'] = max_price
-        
-        if min_price:
-            filters['min_price'] = min_price
-        
-        if search:
-            filters['search'] = search
-        
-        if amenities:
-            filters['amenities'] = [a.strip() for a in amenities.split(',')]
-        
-        if id:
-            filters['id'] = id
-        
-        housing_data = db.get_all_housing(filters)
-        
-        # Transform data for frontend compatibility
-        transformed_data = []
-        for housing in housing_data:
-            transformed_housing = {
-                'id': housing['id'],
-                'name': housing['name'],
-                'location': housing['location'],
-                'price': housing['price_range'],
-                'priceValue': housing['avg_price'],
-                'rating': float(housing['rating']),
-                'members': housing['member_count'],
-                'image': housing['image_url'],
-                'tags': housing['amenities'] or [],
-                'busRoute': housing['bus_routes'][0] if housing['bus_routes'] else '',
-                'area': housing['distance_to_campus'],
-                'housingType': housing['housing_type'],
-                'internationalFriendly': housing['is_international_friendly'],
-                'description': housing['description']
-            }
-            transformed_data.append(transformed_housing)
+        page = await adb.get_housing_page(filters, limit=limit, cursor=cursor, total=total)
         
         return {
-            'housing': transformed_data,
-            'total': len(transformed_data),
+            'housing': [transform_housing(housing) for housing in page['rows']],
+            'total': page['total'],
+            'total_is_estimate': page['total_is_estimate'],
+            'next_cursor': page['next_cursor'],
             'filters_applied': filters
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching housing data: {str(e)}")
 
-@app.post("/api/housing/refresh")
+@app.post("/api/housing/refresh", status_code=202)
 async def refresh_housing():
     """
-    Refresh housing data by re-scraping sources
+    Start a background refresh that re-scrapes sources; poll the returned job for progress
     """
     try:
-        from database import initialize_database
-        
-        # Re-initialize and populate database
-        initialize_database()
-        
-        return {"message": "Housing data refreshed successfully"}
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error refreshing housing data: {str(e)}")
+        job = refresh_jobs.start()
+    except RefreshInProgress as e:
+        raise HTTPException(status_code=409, detail={'message': str(e), 'job_id': e.job_id})
+    
+    return {
+        **job.to_dict(),
+        'status_url': f"/api/housing/refresh/{job.job_id}"
+    }
+
+@app.get("/api/housing/refresh/{job_id}")
+async def get_refresh_job(job_id: str):
+    """
+    Get a refresh job's phase, per-source progress, synced row counts and errors
+    """
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Refresh job not found")
+    
+    return job.to_dict()
+
+@app.post("/api/housing/refresh/{job_id}/cancel")
+async def cancel_refresh_job(job_id: str):
+    """
+    Cancel a running refresh; data already in the database is left unchanged
+    """
+    job = refresh_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Refresh job not found")
+    
+    return job.to_dict()
 
 @app.get("/api/housing/stats")
-async def get_housing_stats():
+async def get_housing_stats(request: Request, response: Response, filters: Dict = Depends(housing_filters)):
     """
-    Get housing statistics
+    Get housing statistics, optionally for a filtered subset
     """
     try:
-        all_housing = db.get_all_housing()
-        
-        stats = {
-            'total_listings': len(all_housing),
-            'on_campus_count': len([h for h in all_housing if h['housing_type'] == 'on_campus']),
-            'off_campus_count': len([h for h in all_housing if h['housing_type'] == 'off_campus']),
-            'international_friendly_count': len([h for h in all_housing if h['is_international_friendly']]),
-            'price_range': {
-                'min': min([h['avg_price'] for h in all_housing]) if all_housing else 0,
-                'max': max([h['avg_price'] for h in all_housing]) if all_housing else 0,
-                'avg': sum([h['avg_price'] for h in all_housing]) // len(all_housing) if all_housing else 0
-            }
-        }
+        not_modified = await check_not_modified(request, response, 'housing_stats')
+        if not_modified:
+            return not_modified
         
-        return stats
+        return await adb.get_housing_stats(filters)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching housing stats: {str(e)}")
 
+def batch_ids(ids: List[int]) -> List[int]:
+    """Deduplicate requested ids, keeping first-seen order, and check their count"""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="ids must list at least one housing id")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} distinct ids per request")
+    return ids
+
+async def housing_batch(ids: List[int]) -> Dict:
+    """Resolve ids checked by batch_ids in one query, in request order, listing the ones not found"""
+    try:
+        result = await adb.get_housing_by_ids(ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching housing: {str(e)}")
+    
+    return {
+        'housing': [transform_housing(housing) for housing in result['rows']],
+        'missing': result['missing']
+    }
+
+@app.get("/api/housing/batch")
+async def get_housing_batch(
+    request: Request,
+    response: Response,
+    ids: str = Query(..., description=f"Comma-separated housing IDs, at most {MAX_BATCH_IDS} distinct")
+):
+    """
+    Get several housing listings by ID in request order; unknown IDs are listed in missing
+    """
+    try:
+        id_list = batch_ids([int(part) for part in ids.split(',') if part.strip()])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    
+    not_modified = await check_not_modified(request, response, 'housing_batch')
+    if not_modified:
+        return not_modified
+    
+    return await housing_batch(id_list)
+
+@app.post("/api/housing/batch")
+async def post_housing_batch(ids: List[int] = Body(..., embed=True, description=f"Housing IDs, at most {MAX_BATCH_IDS} distinct")):
+    """
+    Get several housing listings by ID; body variant of GET /api/housing/batch for long lists
+    """
+    return await housing_batch(batch_ids(ids))
+
+@app.get("/api/housing/export")
+async def export_housing(
+    filters: Dict = Depends(housing_filters),
+    format: str = Query('ndjson', pattern='^(ndjson|csv)$', description="ndjson (one listing per line) or csv"),
+    fetch_size: int = Query(EXPORT_FETCH_SIZE, ge=10, le=10000, description="Rows fetched from the database per round trip"),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description=SORT_DESCRIPTION)
+):
+    """
+    Stream every matching listing, in list order, without loading the result set into memory
+    """
+    if sort:
+        filters = {**filters, 'sort': sort}
+    
+    try:
+        rows = db.iter_housing(filters, fetch_size=fetch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExportsBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '5'})
+    
+    return ExportResponse(
+        rows,
+        export_chunks(rows, format, fetch_size),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="housing.{format}"'}
+    )
+
+@app.get("/api/housing/facets")
+async def get_housing_facets(
+    request: Request,
+    response: Response,
+    filters: Dict = Depends(housing_filters),
+    price_buckets: str = Query(','.join(map(str, DEFAULT_PRICE_BUCKETS)),
+                               description="Ascending comma-separated price bucket bounds")
+):
+    """
+    Get counts per housing type, international flag, amenity and price bucket for the filtered listings
+    """
+    try:
+        bounds = [int(bound) for bound in price_buckets.split(',')]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="price_buckets must be comma-separated integers")
+    
+    try:
+        not_modified = await check_not_modified(request, response, 'housing_facets')
+        if not_modified:
+            return not_modified
+        
+        facets = await adb.get_housing_facets(filters, bounds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching housing facets: {str(e)}")
+    
+    return {
+        **facets,
+        'amenities': [
+            {'key': key, 'label': amenity_label(key), 'count': count}
+            for key, count in facets['amenities'].items()
+        ]
+    }
+
 @app.get("/api/housing/{housing_id}")
-async def get_housing_by_id(housing_id: int):
+async def get_housing_by_id(housing_id: int, request: Request, response: Response):
     """
     Get specific housing by ID
     """
     try:
-        housing_data = db.get_all_housing({'id': housing_id})
+        not_modified = await check_not_modified(request, response, 'housing_item')
+        if not_modified:
+            return not_modified
+        
+        housing_data = await adb.get_all_housing({'id': housing_id})
         
         if not housing_data:
             raise HTTPException(status_code=404, detail="Housing not found")
         
-        housing = housing_data[0]
-        
-        # Transform for frontend
-        transformed_housing = {
-            'id': housing['id'],
-            'name': housing['name'],
-            'location': housing['location'],
-            'price': housing['price_range'],
-            'priceValue': housing['avg_price'],
-            'rating': float(housing['rating']),
-            'members': housing['member_count'],
-            'image': housing['image_url'],
-            'tags': housing['amenities'] or [],
-            'busRoute': housing['bus_routes'][0] if housing['bus_routes'] else '',
-            'area': housing['distance_to_campus'],
-            'housingType': housing['housing_type'],
-            'internationalFriendly': housing['is_international_friendly'],
-            'description': housing['description']
-        }
-        
-        return transformed_housing
+        return transform_housing(housing_data[0])
         
     except HTTPException:
         raise
@@ -0,0 +1,68 @@
+"""
+Async access to HousingDatabase for the FastAPI handlers.
+
+psycopg2 is a blocking driver, so queries are offloaded to a bounded thread
+pool sized to match the connection pool: every worker can hold a connection
+and no worker ever queues inside the pool while the event loop keeps serving
+other requests.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from database import HousingDatabase
+
+
+class AsyncHousingDatabase:
+    def __init__(self, db: HousingDatabase, max_workers: Optional[int] = None):
+        self.db = db
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    workers = self.max_workers
+                    if workers is None:
+                        workers = self.db.pool.max_size if self.db.pool is not None else int(os.getenv('DB_POOL_MAX_SIZE', 10))
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='housing-db')
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run a blocking database call on the worker pool and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (the request's timing) into the worker
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+    async def get_all_housing(self, filters: Optional[Dict] = None) -> List[Dict]:
+        return await self.run(self.db.get_all_housing, filters)
+
+    async def get_housing_page(self, filters: Optional[Dict] = None, **kwargs) -> Dict:
+        return await self.run(self.db.get_housing_page, filters, **kwargs)
+
+    async def get_housing_by_ids(self, ids: List[int]) -> Dict:
+        return await self.run(self.db.get_housing_by_ids, ids)
+
+    async def get_housing_stats(self, filters: Optional[Dict] = None) -> Dict:
+        return await self.run(self.db.get_housing_stats, filters)
+
+    async def get_housing_facets(self, filters: Optional[Dict] = None, price_buckets: Optional[List[int]] = None) -> Dict:
+        return await self.run(self.db.get_housing_facets, filters, price_buckets)
+
+    async def data_state(self) -> tuple:
+        return await self.run(self.db.data_state)
+
+    def shutdown(self):
+        """Stop the worker pool after in-flight queries finish"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
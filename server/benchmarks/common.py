@@ -0,0 +1,111 @@
+"""
+Helpers shared by the benchmark and check scripts: scratch schemas, seeding,
+median timings and starting the API against a scratch schema.
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import HOUSING_COLUMNS, HousingDatabase
+from synthetic_data import generate_batches
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def median_ms(fn: Callable, repeat: int) -> float:
+    """Median wall time of fn() over repeat calls, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def query_ms(cur, query: str, params: Optional[Dict], repeat: int) -> float:
+    """Median milliseconds to run query on cur and fetch every row"""
+    def run():
+        cur.execute(query, params)
+        cur.fetchall()
+    return median_ms(run, repeat)
+
+
+def scratch_dsn(dsn: str, schema: str) -> str:
+    """dsn with its search_path set to schema, so the benchmarks' scratch
+    tables are used and the real housing table is untouched"""
+    separator = '&' if '?' in dsn else '?'
+    return f"{dsn}{separator}options={quote(f'-csearch_path={schema}')}"
+
+
+def seed(base_dsn: str, schema: str, rows: int, reseed: bool):
+    """Create and fill the scratch schema, unless a previous run already did"""
+    admin = psycopg2.connect(base_dsn)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (f"{schema}.housing",))
+        if cur.fetchone()[0] and not reseed:
+            cur.execute(f"SELECT COUNT(*) FROM {schema}.housing")
+            if cur.fetchone()[0] == rows:
+                print(f"Reusing {rows} listings in schema {schema}")
+                admin.close()
+                return
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema}")
+    admin.close()
+
+    db = HousingDatabase()
+    db.db_url = scratch_dsn(base_dsn, schema)
+    db.init_tables()
+    started = time.perf_counter()
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            for done, batch in enumerate(generate_batches(rows), start=1):
+                execute_values(
+                    cur,
+                    f"INSERT INTO housing ({', '.join(HOUSING_COLUMNS)}) VALUES %s",
+                    [db._housing_row(listing) for listing in batch],
+                    page_size=1000
+                )
+                print(f"\rSeeding {schema}: {min(done * 5000, rows)}/{rows}", end='', flush=True)
+            db._mark_data_changed(cur)
+            cur.execute("ANALYZE housing")
+        conn.commit()
+    print(f"\nSeeded in {time.perf_counter() - started:.0f} s")
+
+
+def start_server(dsn: str, workers: int, env: Dict[str, str], timeout: float = 60.0) -> Tuple[subprocess.Popen, str]:
+    """Start uvicorn serving api:app against dsn on a free port; returns (process, base URL)
+    once /api/health answers"""
+    # Imported here so the database-only scripts do not load requests
+    import requests
+    
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--port', str(port), '--workers', str(workers),
+         '--log-level', 'warning'],
+        cwd=SERVER_DIR, env={**os.environ, **env, 'DATABASE_URL': dsn},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=1).ok:
+                return server, base_url
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.05)
+    server.terminate()
+    raise TimeoutError(f"API did not answer within {timeout}s")
@@ -0,0 +1,74 @@
+"""
+Concurrency benchmark for the housing API.
+
+Fires a fixed number of requests at a running API with increasing numbers of
+concurrent clients and reports throughput per level. With the database work
+offloaded from the event loop, throughput should grow with concurrency (up to
+the connection pool size) instead of staying flat.
+
+Usage:
+    cd server && python api.py
+    python benchmarks/concurrency_benchmark.py --url http://localhost:8000/api/housing
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+
+def run_level(url: str, concurrency: int, total_requests: int) -> Dict:
+    """Send total_requests GETs using concurrency parallel clients"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def fetch(_):
+        started = time.perf_counter()
+        response = session.get(url, timeout=30)
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = len([status for _, status in results if status >= 400])
+
+    return {
+        'concurrency': concurrency,
+        'requests': total_requests,
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'throughput_rps': total_requests / elapsed if elapsed else 0.0,
+        'latency_p50_ms': statistics.median(latencies) * 1000,
+        'latency_p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000/api/housing')
+    parser.add_argument('--levels', default='1,2,4,8,16', help='Comma-separated client counts')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per level')
+    args = parser.parse_args(argv)
+
+    levels = [int(level) for level in args.levels.split(',')]
+
+    # Warm up connections and caches before measuring
+    run_level(args.url, max(levels), min(args.requests, 20))
+
+    print(f"{'clients':>8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'errors':>8}")
+    for level in levels:
+        result = run_level(args.url, level, args.requests)
+        print(f"{result['concurrency']:>8} {result['throughput_rps']:>10.1f} "
+              f"{result['latency_p50_ms']:>10.1f} {result['latency_p95_ms']:>10.1f} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Memory check for the streaming export.
+
+Seeds (or reuses) the load test's scratch schema, starts the API against it
+and streams /api/housing/export while reading the server's peak resident set
+size (VmHWM from /proc) before and after. Streaming through a server-side
+cursor should keep the growth flat whatever the row count; the script exits
+non-zero when it exceeds --max-growth-mb.
+
+It also checks the export concurrency limit: with every export slot taken
+by an open stream, another export gets 503 while listings are still served,
+and the slots free up once the streams are closed.
+
+--fetchall additionally loads the same rows the old way (get_all_housing and
+a transformed list) in a child process and reports its peak, for contrast.
+At 1M rows that needs several GB of memory.
+
+Linux only (reads /proc).
+
+Usage:
+    cd server && python benchmarks/export_memory.py --rows 1000000
+"""
+
+import argparse
+import csv
+import io
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import SERVER_DIR, scratch_dsn, seed, start_server
+
+FETCHALL_PROBE = """
+import os, api
+from export_memory import peak_rss_mb
+rows = api.db.get_all_housing()
+items = [api.transform_housing(row) for row in rows]
+print(len(items), peak_rss_mb(os.getpid()))
+"""
+
+
+def peak_rss_mb(pid: int) -> float:
+    """Peak resident set size of a process in MB"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not found; /proc is required")
+
+
+def stream_export(base_url: str, fmt: str, fetch_size: int) -> tuple:
+    """(rows, bytes) read from the export, discarding the body as it arrives"""
+    with requests.get(f"{base_url}/api/housing/export", params={'format': fmt, 'fetch_size': fetch_size},
+                      stream=True, timeout=600) as response:
+        response.raise_for_status()
+        if fmt == 'csv':
+            # Quoted fields (descriptions) may contain newlines, so parse rather than count lines
+            response.raw.decode_content = True
+            rows = sum(1 for _ in csv.reader(io.TextIOWrapper(response.raw, encoding='utf-8', newline=''))) - 1
+            return rows, response.raw.tell()
+
+        lines = size = 0
+        for chunk in response.iter_content(chunk_size=1 << 16):
+            lines += chunk.count(b'\n')
+            size += len(chunk)
+    return lines, size
+
+
+def check_export_limit(base_url: str, timeout: float = 10.0) -> list:
+    """Failure messages from filling every export slot with an open stream"""
+    failures = []
+    streams = []
+    try:
+        while len(streams) < 50:
+            response = requests.get(f"{base_url}/api/housing/export", stream=True, timeout=30)
+            if response.status_code == 503:
+                response.close()
+                break
+            # Keep the body iterator: dropping it makes urllib3 close the connection
+            body = response.iter_content(chunk_size=1024)
+            next(body)
+            streams.append((response, body))
+        else:
+            failures.append("no 503 after 50 concurrent exports")
+        print(f"export limit: {len(streams)} concurrent exports, then 503")
+
+        listing = requests.get(f"{base_url}/api/housing", params={'limit': 5}, timeout=timeout)
+        if listing.status_code != 200:
+            failures.append(f"/api/housing returned {listing.status_code} with the export slots full")
+    finally:
+        for response, _ in streams:
+            response.close()
+
+    # The server notices the closed streams asynchronously
+    deadline = time.monotonic() + timeout
+    while True:
+        status = requests.get(f"{base_url}/api/housing/export", params={'id': 1}, timeout=timeout).status_code
+        if status == 200 or time.monotonic() > deadline:
+            break
+        time.sleep(0.2)
+    if status != 200:
+        failures.append(f"export still returns {status} after the streams closed")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--fetch-size', type=int, default=1000)
+    parser.add_argument('--max-growth-mb', type=float, default=100.0)
+    parser.add_argument('--reseed', action='store_true')
+    parser.add_argument('--fetchall', action='store_true', help='Also measure loading every row into a list')
+    args = parser.parse_args()
+
+    base_dsn = os.environ['DATABASE_URL']
+    schema = f"load_test_{args.rows}"
+    seed(base_dsn, schema, args.rows, args.reseed)
+
+    server, base_url = start_server(scratch_dsn(base_dsn, schema), 1, {})
+    try:
+        # Warm up imports, the pool and the export path itself on a small slice
+        requests.get(f"{base_url}/api/housing/export", params={'id': 1}, timeout=30)
+        before = peak_rss_mb(server.pid)
+
+        started = time.perf_counter()
+        rows, size = stream_export(base_url, args.format, args.fetch_size)
+        elapsed = time.perf_counter() - started
+        after = peak_rss_mb(server.pid)
+
+        limit_failures = check_export_limit(base_url)
+    finally:
+        server.terminate()
+        server.wait()
+
+    growth = after - before
+    print(f"exported {rows} rows, {size / 1e6:.0f} MB of {args.format} in {elapsed:.1f} s "
+          f"({rows / elapsed:.0f} rows/s)")
+    print(f"server peak RSS: {before:.0f} MB before, {after:.0f} MB after (growth {growth:.1f} MB)")
+
+    if args.fetchall:
+        output = subprocess.run([sys.executable, '-c', FETCHALL_PROBE], cwd=SERVER_DIR, check=True,
+                                env={**os.environ, 'DATABASE_URL': scratch_dsn(base_dsn, schema),
+                                     'PYTHONPATH': os.path.dirname(os.path.abspath(__file__))},
+                                capture_output=True, text=True).stdout
+        count, peak = output.split()[-2:]
+        print(f"fetchall + transform of {count} rows: peak RSS {float(peak):.0f} MB")
+
+    if limit_failures:
+        sys.exit('; '.join(limit_failures))
+    if rows != args.rows:
+        sys.exit(f"expected {args.rows} rows, exported {rows}")
+    if growth > args.max_growth_mb:
+        sys.exit(f"peak RSS grew {growth:.1f} MB, over the {args.max_growth_mb:.0f} MB limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Facet count check and timing.
+
+Loads synthetic listings into a scratch schema (see common.scratch_dsn).
+For each filter set it checks every count /api/housing/facets reports
+against the exact total of the list query with that facet value added as a
+filter: each housing type, international flag, amenity and price bucket.
+It also checks that each facet request runs a single query and that the
+unfiltered facets cover every seeded row, so the comparison cannot pass on
+empty counts. With NumPy installed, it checks that the snapshot computes the
+same facets without a facet query. Finally it times the single facet query
+against the per-chip list counts it replaces. Exits non-zero on any failed
+check.
+
+Usage:
+    cd server && python benchmarks/facet_parity.py --rows 20000
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from amenities import normalize_amenities
+from database import DEFAULT_PRICE_BUCKETS, HousingDatabase
+from common import median_ms, scratch_dsn
+from snapshot import SnapshotStore, load_numpy
+from synthetic_data import generate_listings
+
+SCHEMA = 'facet_parity'
+
+CASES = [
+    {},
+    {'housing_type': 'off_campus'},
+    {'international_friendly': True, 'max_price': 900},
+    {'min_price': 650},
+    {'amenities': normalize_amenities(['Pool']), 'amenity_match': 'all'},
+    {'search': 'furnished'},
+    {'search': 'rooftop', 'search_mode': 'ilike'},
+    {'near': (29.6488, -82.3433), 'radius': 2},
+    {'housing_type': 'no_such_type'},
+]
+
+
+def facet_queries() -> int:
+    return sum(value for suffix, labels, value in metrics.DB_QUERY_SECONDS.samples()
+               if suffix == '_count' and 'operation="facets"' in labels)
+
+
+def queries_run(fn) -> tuple:
+    """(fn's result, facet queries it ran)"""
+    before = facet_queries()
+    result = fn()
+    return result, facet_queries() - before
+
+
+def list_total(db: HousingDatabase, filters: Dict) -> int:
+    return db._query_housing_page(filters, 1, None, 'exact')['total']
+
+
+def expected_counts(db: HousingDatabase, filters: Dict, facets: Dict) -> List[tuple]:
+    """(facet, value, reported count, list total with that value as a filter)"""
+    checks = [('total', None, facets['total'], list_total(db, filters))]
+
+    # A value that contradicts the case's own filter on that facet matches nothing
+    for housing_type, count in facets['housing_type'].items():
+        conflict = filters.get('housing_type', housing_type) != housing_type
+        expected = 0 if conflict else list_total(db, {**filters, 'housing_type': housing_type})
+        checks.append(('housing_type', housing_type, count, expected))
+
+    for flag, count in facets['international_friendly'].items():
+        value = flag == 'true'
+        conflict = filters.get('international_friendly', value) != value
+        expected = 0 if conflict else list_total(db, {**filters, 'international_friendly': value})
+        checks.append(('international_friendly', flag, count, expected))
+
+    for amenity, count in facets['amenities'].items():
+        narrowed = {**filters, 'amenities': sorted(set(filters.get('amenities', [])) | {amenity}),
+                    'amenity_match': 'all'}
+        checks.append(('amenity', amenity, count, list_total(db, narrowed)))
+
+    for bucket in facets['price_buckets']:
+        narrowed = dict(filters)
+        if bucket['min'] is not None:
+            narrowed['min_price'] = max(bucket['min'], filters.get('min_price') or 0)
+        if bucket['max'] is not None:
+            narrowed['max_price'] = min(bucket['max'], filters.get('max_price') or bucket['max'])
+        expected = list_total(db, narrowed) if narrowed.get('min_price', 0) <= narrowed.get('max_price', 1e9) else 0
+        checks.append(('price', f"{bucket['min']}-{bucket['max']}", bucket['count'], expected))
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    base_dsn = os.environ['DATABASE_URL']
+    admin = psycopg2.connect(base_dsn)
+    admin.autocommit = True
+    admin.cursor().execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    os.environ['DATABASE_URL'] = scratch_dsn(base_dsn, SCHEMA)
+
+    failures = []
+    try:
+        db = HousingDatabase()
+        db.open_pool()
+        db.init_tables()
+        print(f"Seeding {args.rows} synthetic listings...")
+        db.bulk_insert_housing(list(generate_listings(args.rows)), batch_size=5000)
+        snapshot_db = HousingDatabase(pool=db.pool, snapshots=SnapshotStore()) if load_numpy() is not None else None
+
+        facets = db._query_housing_facets({}, DEFAULT_PRICE_BUCKETS)
+        # Guards against the checks below passing vacuously on empty facets
+        unseen = [facet for facet in ('housing_type', 'international_friendly', 'amenities')
+                  if sum(facets[facet].values()) == 0]
+        if facets['total'] != args.rows or unseen or sum(bool(b['count']) for b in facets['price_buckets']) < 2:
+            failures.append(f"unfiltered facets: total {facets['total']} of {args.rows}, empty {unseen}, "
+                            f"buckets {[b['count'] for b in facets['price_buckets']]}")
+
+        for filters in CASES:
+            facets, queries = queries_run(lambda: db._query_housing_facets(filters, DEFAULT_PRICE_BUCKETS))
+            mismatches = [check for check in expected_counts(db, filters, facets) if check[2] != check[3]]
+            for facet, value, reported, expected in mismatches:
+                failures.append(f"{filters} {facet} {value}: facets {reported}, list {expected}")
+            if queries != 1:
+                failures.append(f"{filters}: facets ran {queries} queries, expected 1")
+            if snapshot_db is not None:
+                snapshot_facets, queries = queries_run(
+                    lambda: snapshot_db._query_housing_facets(filters, DEFAULT_PRICE_BUCKETS))
+                if snapshot_facets != facets:
+                    failures.append(f"{filters}: snapshot facets differ")
+                elif queries:
+                    failures.append(f"{filters}: snapshot facets ran {queries} queries")
+            print(f"{'ok  ' if not mismatches else 'FAIL'} {filters} total={facets['total']} "
+                  f"amenities={len(facets['amenities'])}")
+
+        print(f"\n{'filters':<50} {'facets ms':>10} {'per-chip ms':>12} {'queries':>8}")
+        for filters in CASES[:4]:
+            facets = db._query_housing_facets(filters, DEFAULT_PRICE_BUCKETS)
+            chips = expected_counts(db, filters, facets)
+            facet_ms = median_ms(lambda: db._query_housing_facets(filters, DEFAULT_PRICE_BUCKETS), args.repeat)
+            chip_ms = median_ms(lambda: expected_counts(db, filters, facets), max(1, args.repeat // 5))
+            print(f"{str(filters)[:50]:<50} {facet_ms:>10.1f} {chip_ms:>12.1f} {len(chips):>8}")
+        if snapshot_db is not None:
+            snapshot_ms = median_ms(lambda: snapshot_db._query_housing_facets({}, DEFAULT_PRICE_BUCKETS), args.repeat)
+            print(f"snapshot facets, no filters: {snapshot_ms:.2f} ms")
+
+        db.close_pool()
+    finally:
+        admin.cursor().execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"\n{'Facet counts match list results' if not failures else f'{len(failures)} facet failures'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
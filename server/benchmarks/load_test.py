@@ -0,0 +1,304 @@
+"""
+End-to-end load test for the housing API.
+
+Seeds a scratch schema with synthetic listings (see common.scratch_dsn),
+starts uvicorn against it and replays a weighted mix of list, filter, search,
+distance, by-id and stats requests at each concurrency level. Every client
+runs closed-loop for --duration seconds. Per endpoint it reports p50/p95/p99 latency, throughput,
+errors and the database time the API reports in its Server-Timing header.
+
+Seeded schemas are kept (load_test_<rows>) and reused by later runs with the
+same --rows, so 100k and 1M datasets are only built once; --reseed rebuilds.
+
+Results are written as JSON; compare two runs (e.g. before and after a
+commit) with --compare.
+
+Usage:
+    cd server && python benchmarks/load_test.py --rows 100000 --levels 1,8,32
+    python benchmarks/load_test.py --compare load-test-before.json load-test-after.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import SERVER_DIR, scratch_dsn, seed, start_server
+from synthetic_data import AMENITIES
+
+CAMPUS = '29.6488,-82.3433'
+SEARCH_TERMS = ['stoneridge', 'furnished', 'rooftop lounge', 'intern', 'campus shuttle', 'lark', 'pool']
+DB_TIME_PATTERN = re.compile(r'\bdb;dur=([\d.]+)')
+
+
+def _price_filter(rng: random.Random) -> Dict:
+    low = rng.randrange(500, 1000, 50)
+    return {'min_price': low, 'max_price': low + rng.choice([100, 200, 400])}
+
+
+def _list(rng, ctx):
+    return '/api/housing', {'limit': rng.choice([20, 50])}
+
+
+def _list_filtered(rng, ctx):
+    params = rng.choice([
+        {'housing_type': rng.choice(['on_campus', 'off_campus'])},
+        {'international_friendly': rng.choice(['true', 'false'])},
+        _price_filter(rng),
+        {'housing_type': 'off_campus', 'international_friendly': 'true', **_price_filter(rng)},
+    ])
+    return '/api/housing', params
+
+
+def _list_next_page(rng, ctx):
+    return '/api/housing', {'cursor': rng.choice(ctx['cursors'])}
+
+
+def _amenities(rng, ctx):
+    return '/api/housing', {'amenities': ','.join(rng.sample(AMENITIES, rng.randint(1, 3))),
+                            'match': rng.choice(['any', 'all'])}
+
+
+def _search(rng, ctx):
+    return '/api/housing', {'search': rng.choice(SEARCH_TERMS)}
+
+
+def _near(rng, ctx):
+    return '/api/housing', {'near': CAMPUS, 'radius': rng.choice([0.5, 1, 2, 3]), 'sort': 'distance'}
+
+
+def _by_id(rng, ctx):
+    return f"/api/housing/{rng.choice(ctx['ids'])}", {}
+
+
+def _stats(rng, ctx):
+    return '/api/housing/stats', {}
+
+
+def _stats_filtered(rng, ctx):
+    return '/api/housing/stats', rng.choice([{'housing_type': 'on_campus'}, _price_filter(rng)])
+
+
+# (endpoint, weight, request builder); weights approximate the frontend's traffic
+REQUEST_MIX: List[Tuple[str, int, Callable]] = [
+    ('list', 25, _list),
+    ('list_filtered', 20, _list_filtered),
+    ('list_next_page', 5, _list_next_page),
+    ('list_amenities', 10, _amenities),
+    ('search', 15, _search),
+    ('near', 5, _near),
+    ('by_id', 15, _by_id),
+    ('stats', 3, _stats),
+    ('stats_filtered', 2, _stats_filtered),
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def request_context(base_dsn: str, schema: str, base_url: str) -> Dict:
+    """Listing ids for by-id requests and cursors for next-page requests"""
+    conn = psycopg2.connect(scratch_dsn(base_dsn, schema))
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM housing ORDER BY random() LIMIT 5000")
+        ids = [row[0] for row in cur.fetchall()]
+    conn.close()
+
+    cursors, params = [], {'limit': 50}
+    for _ in range(20):
+        page = requests.get(f"{base_url}/api/housing", params=params, timeout=30).json()
+        if not page['next_cursor']:
+            break
+        cursors.append(page['next_cursor'])
+        params = {'limit': 50, 'cursor': page['next_cursor']}
+    return {'ids': ids, 'cursors': cursors or [None]}
+
+
+def run_level(base_url: str, ctx: Dict, concurrency: int, duration: float, seed_value: int) -> Dict:
+    """Run concurrency closed-loop clients for duration seconds"""
+    names = [name for name, _, _ in REQUEST_MIX]
+    weights = [weight for _, weight, _ in REQUEST_MIX]
+    builders = {name: builder for name, _, builder in REQUEST_MIX}
+    samples: List[Tuple[str, float, int, Optional[float]]] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index: int):
+        rng = random.Random(seed_value * 1000 + index)
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            path, params = builders[name](rng, ctx)
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, params=params, timeout=30)
+                status = response.status_code
+                db_time = DB_TIME_PATTERN.search(response.headers.get('Server-Timing', ''))
+            except requests.RequestException:
+                status, db_time = 0, None
+            local.append((name, time.perf_counter() - started, status, float(db_time.group(1)) if db_time else None))
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {name: summarize([s for s in samples if s[0] == name], elapsed) for name in names}
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'overall': summarize(samples, elapsed),
+        'endpoints': {name: summary for name, summary in endpoints.items() if summary['requests']},
+    }
+
+
+def summarize(samples: List[Tuple], elapsed: float) -> Dict:
+    latencies = sorted(latency * 1000 for _, latency, _, _ in samples)
+    db_times = sorted(db_ms for _, _, _, db_ms in samples if db_ms is not None)
+    return {
+        'requests': len(samples),
+        'errors': len([status for _, _, status, _ in samples if status == 0 or status >= 400]),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'latency_p50_ms': round(percentile(latencies, 50), 3),
+        'latency_p95_ms': round(percentile(latencies, 95), 3),
+        'latency_p99_ms': round(percentile(latencies, 99), 3),
+        'db_p50_ms': round(percentile(db_times, 50), 3),
+        'db_p95_ms': round(percentile(db_times, 95), 3),
+        'db_mean_ms': round(sum(db_times) / len(db_times), 3) if db_times else 0.0,
+    }
+
+
+def print_level(level: Dict):
+    print(f"\nconcurrency {level['concurrency']}: {level['overall']['throughput_rps']:.1f} req/s, "
+          f"{level['overall']['errors']} errors")
+    print(f"{'endpoint':<16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db p50':>8} {'db p95':>8} {'errors':>7}")
+    for name, row in [*level['endpoints'].items(), ('ALL', level['overall'])]:
+        print(f"{name:<16} {row['throughput_rps']:>8.1f} {row['latency_p50_ms']:>8.2f} {row['latency_p95_ms']:>8.2f} "
+              f"{row['latency_p99_ms']:>8.2f} {row['db_p50_ms']:>8.2f} {row['db_p95_ms']:>8.2f} {row['errors']:>7}")
+
+
+def compare(before_path: str, after_path: str):
+    """Print per-endpoint changes between two result files"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"before: {before['meta']['commit']} ({before['meta']['rows']} rows)  "
+          f"after: {after['meta']['commit']} ({after['meta']['rows']} rows)")
+
+    before_levels = {level['concurrency']: level for level in before['levels']}
+    for level in after['levels']:
+        base = before_levels.get(level['concurrency'])
+        if base is None:
+            continue
+        print(f"\nconcurrency {level['concurrency']}")
+        print(f"{'endpoint':<16} {'req/s':>16} {'p95 ms':>18} {'p99 ms':>18}")
+        rows = [*level['endpoints'].items(), ('ALL', level['overall'])]
+        for name, row in rows:
+            old = base['overall'] if name == 'ALL' else base['endpoints'].get(name)
+            if old is None:
+                continue
+            cells = []
+            for key in ('throughput_rps', 'latency_p95_ms', 'latency_p99_ms'):
+                change = (row[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                cells.append(f"{row[key]:>9.1f} {change:>+6.0f}%")
+            print(f"{name:<16} {cells[0]:>16} {cells[1]:>18} {cells[2]:>18}")
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SERVER_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='Synthetic listings to seed, e.g. 1000, 100000, 1000000')
+    parser.add_argument('--levels', default='1,8,32', help='Comma-separated concurrent client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds before the first level')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Extra environment for the API, e.g. HOUSING_SNAPSHOT=1')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--reseed', action='store_true', help='Rebuild the scratch schema')
+    parser.add_argument('--output', help='Result file (default: load-test-<rows>-<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two result files and exit')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    base_dsn = os.environ['DATABASE_URL']
+    schema = f"load_test_{args.rows}"
+    levels = [int(level) for level in args.levels.split(',')]
+    env = dict(item.split('=', 1) for item in args.env)
+    commit = git_commit()
+
+    seed(base_dsn, schema, args.rows, args.reseed)
+    server, base_url = start_server(scratch_dsn(base_dsn, schema), args.workers, env)
+    try:
+        ctx = request_context(base_dsn, schema, base_url)
+        if args.warmup:
+            run_level(base_url, ctx, max(levels), args.warmup, args.seed)
+
+        results = []
+        for level in levels:
+            results.append(run_level(base_url, ctx, level, args.duration, args.seed))
+            print_level(results[-1])
+    finally:
+        server.terminate()
+        server.wait()
+
+    output = args.output or f"load-test-{args.rows}-{commit}.json"
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'commit': commit,
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'rows': args.rows,
+                'duration_s': args.duration,
+                'workers': args.workers,
+                'env': env,
+                'seed': args.seed,
+                'mix': {name: weight for name, weight, _ in REQUEST_MIX},
+                'python': platform.python_version(),
+            },
+            'levels': results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
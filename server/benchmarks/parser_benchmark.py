@@ -0,0 +1,256 @@
+"""
+Listing parser benchmark and parity check.
+
+Runs the saved page texts in benchmarks/fixtures/pages through both the
+ListingParser engine and a verbatim copy of the previous per-keyword parser.
+Fails if their output differs, then reports per-page parse time for each.
+Bus routes are compared as sets, since the previous parser returned them in
+set order.
+
+Usage:
+    cd server && python benchmarks/parser_benchmark.py --repeat 200 --scale 20
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listing_parser import ListingParser
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+
+
+class LegacyParser:
+    """The parser as it was before ListingParser, kept for parity and comparison"""
+
+    def _parse_housing_content(self, content: str, source_url: str, housing_type: str) -> List[Dict]:
+        """Parse extracted content to find housing information"""
+        housing_listings = []
+        
+        # Extract basic information from content
+        # This is a simplified parser - in reality, you'd need more sophisticated parsing
+        
+        # Look for common patterns in housing websites
+        price_patterns = [
+            r'\$(\d+)(?:,\d+)?(?:\.\d+)?(?:/month|/mo|per month)',
+            r'\$(\d+)(?:,\d+)?(?:\.\d+)?'
+        ]
+        
+        # Extract prices
+        prices = []
+        for pattern in price_patterns:
+            matches = re.findall(pattern, content, re.IGNORECASE)
+            prices.extend([int(match.replace(',', '')) for match in matches if match.isdigit()])
+        
+        # Determine housing characteristics based on URL and content
+        name = self._extract_property_name(source_url, content)
+        location = self._extract_location(content)
+        amenities = self._extract_amenities(content)
+        
+        # Determine if international student friendly
+        is_international_friendly = self._is_international_friendly(content)
+        
+        # Create housing listing
+        if name and prices:
+            avg_price = sum(prices[:3]) // len(prices[:3]) if prices else 750  # Use average of first few prices found
+            
+            housing_info = {
+                'name': name,
+                'location': location or 'Gainesville, FL',
+                'price_range': f"${min(prices)}-${max(prices)}" if len(prices) > 1 else f"${avg_price}",
+                'avg_price': avg_price,
+                'housing_type': housing_type,
+                'is_international_friendly': is_international_friendly,
+                'amenities': amenities,
+                'source_url': source_url,
+                'distance_to_campus': self._estimate_distance(location or ''),
+                'bus_routes': self._extract_bus_routes(content),
+                'description': self._extract_description(content)
+            }
+            
+            housing_listings.append(housing_info)
+        
+        return housing_listings
+
+    def _extract_property_name(self, url: str, content: str) -> str:
+        """Extract property name from URL or content"""
+        # Try to get name from URL first
+        domain = urlparse(url).netloc
+        if 'alight' in domain:
+            return 'Alight Gainesville'
+        elif 'lark' in domain:
+            return 'Lark Gainesville' 
+        elif 'standard' in domain:
+            return 'The Standard at Gainesville'
+        elif 'huboncampus' in domain:
+            return 'Hub On Campus Gainesville'
+        elif 'redpoint' in domain:
+            return 'Redpoint Gainesville'
+        elif 'retreat' in domain:
+            return 'The Retreat at Gainesville'
+        
+        # Try to extract from content
+        name_patterns = [
+            r'(?:Welcome to|About) ([A-Z][A-Za-z\s&]+(?:Gainesville|Apartments|Village|Commons))',
+            r'([A-Z][A-Za-z\s&]+(?:Gainesville|Apartments|Village|Commons))'
+        ]
+        
+        for pattern in name_patterns:
+            match = re.search(pattern, content)
+            if match:
+                return match.group(1).strip()
+        
+        return "Student Housing"
+
+    def _extract_location(self, content: str) -> Optional[str]:
+        """Extract location information"""
+        location_patterns = [
+            r'(\d+\s+(?:SW|NW|SE|NE|North|South|East|West)\s+[A-Za-z\s]+(?:Street|Ave|Avenue|Place|Road|Dr|Drive))',
+            r'((?:SW|NW|SE|NE)\s+\d+\w*\s+(?:Street|Ave|Avenue|Place|Road))'
+        ]
+        
+        for pattern in location_patterns:
+            match = re.search(pattern, content, re.IGNORECASE)
+            if match:
+                return match.group(1)
+        
+        return None
+
+    def _extract_amenities(self, content: str) -> List[str]:
+        """Extract amenities from content"""
+        amenity_keywords = [
+            'pool', 'gym', 'fitness', 'parking', 'furnished', 'laundry',
+            'wifi', 'internet', 'study', 'lounge', 'tennis', 'basketball',
+            'volleyball', 'pet-friendly', 'shuttle', 'bus'
+        ]
+        
+        found_amenities = []
+        content_lower = content.lower()
+        
+        for amenity in amenity_keywords:
+            if amenity in content_lower:
+                found_amenities.append(amenity.title())
+        
+        return found_amenities[:8]  # Limit to 8 amenities
+
+    def _is_international_friendly(self, content: str) -> bool:
+        """Determine if housing is international student friendly"""
+        international_keywords = [
+            'international', 'global', 'furnished', 'short-term',
+            'all-inclusive', 'utilities included', 'no guarantor',
+            'visa', 'f-1', 'student visa'
+        ]
+        
+        content_lower = content.lower()
+        return any(keyword in content_lower for keyword in international_keywords)
+
+    def _estimate_distance(self, location: str) -> str:
+        """Estimate distance to campus based on location"""
+        if not location:
+            return "2.5 miles from campus"
+        
+        # Simple heuristic based on street names
+        if any(area in location.lower() for area in ['13th', 'university', 'campus']):
+            return "0.5-1.5 miles from campus"
+        elif any(area in location.lower() for area in ['20th', '34th', '35th']):
+            return "1.5-3 miles from campus"
+        else:
+            return "2-4 miles from campus"
+
+    def _extract_bus_routes(self, content: str) -> List[str]:
+        """Extract bus route information"""
+        # Look for RTS route information
+        route_patterns = [
+            r'route\s+(\d+)',
+            r'rts\s+(\d+)',
+            r'bus\s+(\d+)'
+        ]
+        
+        routes = []
+        for pattern in route_patterns:
+            matches = re.findall(pattern, content, re.IGNORECASE)
+            routes.extend(matches)
+        
+        return list(set(routes))  # Remove duplicates
+
+    def _extract_description(self, content: str) -> str:
+        """Extract or generate description"""
+        # Try to find description-like content
+        sentences = content.split('.')[:5]  # First 5 sentences
+        description = '. '.join(sentences).strip()
+        
+        # Limit length
+        if len(description) > 200:
+            description = description[:197] + "..."
+        
+        return description or "Student housing in Gainesville near University of Florida."
+
+
+def load_fixtures(scale: int = 1) -> List[Dict]:
+    """Saved page texts; the source URL is derived from the file name"""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        name = os.path.splitext(os.path.basename(path))[0]
+        fixtures.append({
+            'name': name,
+            'url': f"https://{name}.com/",
+            'content': '\n'.join([content] * scale),
+        })
+    return fixtures
+
+
+def _comparable(listings: List[Dict]) -> List[Dict]:
+    return [{**listing, 'bus_routes': sorted(listing['bus_routes'])} for listing in listings]
+
+
+def check_parity(fixtures: List[Dict]) -> List[str]:
+    legacy, engine = LegacyParser(), ListingParser()
+    mismatches = []
+    for fixture in fixtures:
+        expected = legacy._parse_housing_content(fixture['content'], fixture['url'], 'off_campus')
+        actual = engine.parse(fixture['content'], fixture['url'], 'off_campus')
+        if _comparable(expected) != _comparable(actual):
+            mismatches.append(fixture['name'])
+    return mismatches
+
+
+def time_parser(parse, fixture: Dict, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse(fixture['content'], fixture['url'], 'off_campus')
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='Parses per page and parser')
+    parser.add_argument('--scale', type=int, default=1, help='Repeat each page text this many times')
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.scale)
+    mismatches = check_parity(fixtures)
+    if mismatches:
+        print(f"Parity check FAILED for: {', '.join(mismatches)}")
+        sys.exit(1)
+    print(f"Parity check passed on {len(fixtures)} fixture pages")
+
+    legacy, engine = LegacyParser(), ListingParser()
+    print(f"{'page':<24} {'chars':>8} {'legacy us':>10} {'engine us':>10} {'speedup':>8}")
+    for fixture in fixtures:
+        legacy_us = time_parser(legacy._parse_housing_content, fixture, args.repeat)
+        engine_us = time_parser(engine.parse, fixture, args.repeat)
+        print(f"{fixture['name']:<24} {len(fixture['content']):>8} {legacy_us:>10.1f} {engine_us:>10.1f} "
+              f"{legacy_us / engine_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
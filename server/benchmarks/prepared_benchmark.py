@@ -0,0 +1,136 @@
+"""
+Prepared statement benchmark and plan check.
+
+Seeds (or reuses) the load test's scratch schema and, for each filter shape
+of the page query (and its exact count), compares the plain path, which
+sends the full SQL text so Postgres parses and plans it every time, against
+EXECUTE of the statement prepared by PreparedStatements. Reports median
+client latency of both and the server's planning time from EXPLAIN
+ANALYZE. Fails when a shape is not prepared, when EXECUTE returns different
+rows from the plain query, or when EXPLAIN EXECUTE, after enough runs for
+Postgres to consider a generic plan, does not use one of the expected
+indexes.
+
+Usage:
+    cd server && python benchmarks/prepared_benchmark.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from amenities import normalize_amenities
+from database import HousingDatabase
+from common import query_ms, scratch_dsn, seed
+from prepared_statements import PreparedStatements
+
+GAINESVILLE = (29.6488, -82.3433)
+# Indexes led by housing_type; any of them can count a type
+TYPE_INDEXES = {'idx_housing_type_list_order', 'idx_housing_type_price_order', 'idx_housing_type_members_order',
+                'idx_housing_type_newest'}
+
+# (filters, next page?, indexes the page query may use, indexes the count may use);
+# None means no index can help, so any plan passes
+SHAPES = [
+    ({}, False, {'idx_housing_list_order'}, None),
+    ({}, True, {'idx_housing_list_order'}, None),
+    ({'housing_type': 'off_campus'}, False, {'idx_housing_list_order', 'idx_housing_type_list_order'}, TYPE_INDEXES),
+    ({'international_friendly': True}, False, {'idx_housing_list_order', 'idx_housing_international'},
+     {'idx_housing_international'}),
+    ({'min_price': 650, 'max_price': 900}, False, {'idx_housing_list_order', 'idx_housing_price_order'},
+     {'idx_housing_price_order'}),
+    ({'amenities': normalize_amenities(['Pool']), 'amenity_match': 'all'}, False,
+     {'idx_housing_list_order', 'idx_housing_amenities'}, {'idx_housing_amenities'}),
+    ({'search': 'furnished'}, False, {'idx_housing_search'}, {'idx_housing_search'}),
+    ({'search': 'rooftop', 'search_mode': 'ilike'}, False, {'idx_housing_list_order'}, None),
+    ({'near': GAINESVILLE, 'radius': 2}, False, {'idx_housing_list_order', 'idx_housing_grid_cell'},
+     {'idx_housing_grid_cell'}),
+    ({'near': GAINESVILLE, 'radius': 2, 'sort': 'distance'}, False, {'idx_housing_grid_cell'},
+     {'idx_housing_grid_cell'}),
+    ({'id': 5}, False, {'housing_pkey'}, {'housing_pkey'}),
+]
+
+
+def plan_indexes(plan: Dict) -> List[str]:
+    """Index names used anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    names = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        names.extend(plan_indexes(child))
+    return names
+
+
+def planning_ms(cur, query: str, params: Optional[Dict]) -> float:
+    cur.execute("EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) " + query, params)
+    return cur.fetchone()['QUERY PLAN'][0]['Planning Time']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--reseed', action='store_true')
+    args = parser.parse_args()
+
+    base_dsn = os.environ['DATABASE_URL']
+    schema = f"load_test_{args.rows}"
+    seed(base_dsn, schema, args.rows, args.reseed)
+    os.environ['DATABASE_URL'] = scratch_dsn(base_dsn, schema)
+
+    statements = PreparedStatements()
+    db = HousingDatabase(statements=statements)
+    db.open_pool()
+    db.init_tables()
+    next_cursor = db.get_housing_page({}, limit=50)['next_cursor']
+
+    failures = []
+    print(f"{'shape':<52} {'query':<6} {'plain ms':>9} {'prep ms':>8} {'plan ms':>8} {'prep plan':>10}  indexes")
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            for filters, next_page, page_indexes, count_indexes in SHAPES:
+                query, params, filter_clauses, _ = db._page_query(filters, 50, next_cursor if next_page else None)
+                count_query = "SELECT COUNT(*) AS total FROM housing"
+                if filter_clauses:
+                    count_query += " WHERE " + " AND ".join(filter_clauses)
+                label = f"{filters}{' next page' if next_page else ''}"[:52]
+
+                for operation, sql, expected in (('page', query, page_indexes), ('count', count_query, count_indexes)):
+                    if operation == 'page' and 'search_query' in params:
+                        # Full-text pages run unprepared (see _query_housing_page)
+                        continue
+                    execute, execute_params = statements.bind(cur, operation, sql, params)
+                    if not execute.startswith('EXECUTE '):
+                        failures.append(f"{label} {operation}: not prepared")
+                    cur.execute(sql, params)
+                    plain_rows = cur.fetchall()
+                    for _ in range(6):
+                        # Past the custom-plan runs, so EXPLAIN shows the plan the API keeps using
+                        cur.execute(execute, execute_params)
+                    if cur.fetchall() != plain_rows:
+                        failures.append(f"{label} {operation}: EXECUTE returns different rows")
+                    plain = query_ms(cur, sql, params, args.repeat)
+                    prepared = query_ms(cur, execute, execute_params, args.repeat)
+
+                    cur.execute("EXPLAIN (FORMAT JSON) " + execute, execute_params)
+                    indexes = plan_indexes(cur.fetchone()['QUERY PLAN'][0]['Plan'])
+                    if expected is not None and not expected & set(indexes):
+                        failures.append(f"{label} {operation}: uses {indexes or 'no index'}, expected one of "
+                                        f"{sorted(expected)}")
+
+                    print(f"{label:<52} {operation:<6} {plain:>9.3f} {prepared:>8.3f} "
+                          f"{planning_ms(cur, sql, params):>8.3f} {planning_ms(cur, execute, execute_params):>10.3f}"
+                          f"  {','.join(indexes) or '-'}")
+    db.close_pool()
+
+    print(f"\nregistry: {statements.stats()}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"\n{'Every shape is prepared and uses an expected index' if not failures else f'{len(failures)} failures'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
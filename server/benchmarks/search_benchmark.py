@@ -0,0 +1,89 @@
+"""
+Full-text search vs. ILIKE benchmark.
+
+Seeds the housing table with synthetic listings inside a transaction, runs
+each search term through both search paths of HousingDatabase._build_filters
+and reports median latency, match count and the plan's scan type. The
+transaction is rolled back at the end, so existing data is left untouched.
+
+Usage:
+    cd server && python benchmarks/search_benchmark.py --rows 100000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import HousingDatabase, HOUSING_COLUMNS
+from synthetic_data import generate_batches
+
+
+def _plan_scans(plan: dict) -> List[str]:
+    """Collect scan node types from an EXPLAIN (FORMAT JSON) plan"""
+    scans = [plan['Node Type']] if 'Scan' in plan['Node Type'] else []
+    for child in plan.get('Plans', []):
+        scans.extend(_plan_scans(child))
+    return scans
+
+
+def time_search(cur, db: HousingDatabase, term: str, mode: str, repeat: int) -> dict:
+    clauses, params = db._build_filters({'search': term, 'search_mode': mode})
+    query = "SELECT id FROM housing WHERE " + " AND ".join(clauses)
+
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    scans = _plan_scans(cur.fetchone()['QUERY PLAN'][0]['Plan'])
+
+    timings = []
+    matches = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cur.execute(query, params)
+        matches = len(cur.fetchall())
+        timings.append(time.perf_counter() - started)
+
+    return {'median_ms': statistics.median(timings) * 1000, 'matches': matches, 'scans': scans}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--terms', default='stoneridge,furnished,rooftop lounge,intern,campus shuttle')
+    args = parser.parse_args(argv)
+
+    db = HousingDatabase()
+    db.init_tables()
+
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM housing")
+            print(f"Seeding {args.rows} synthetic listings...")
+            for batch in generate_batches(args.rows):
+                execute_values(
+                    cur,
+                    f"INSERT INTO housing ({', '.join(HOUSING_COLUMNS)}) VALUES %s",
+                    [db._housing_row(listing) for listing in batch],
+                    page_size=1000
+                )
+            cur.execute("ANALYZE housing")
+
+            print(f"{'term':<20} {'mode':<6} {'median ms':>10} {'matches':>8}  plan")
+            for term in args.terms.split(','):
+                for mode in ('ilike', 'fts'):
+                    result = time_search(cur, db, term, mode, args.repeat)
+                    print(f"{term:<20} {mode:<6} {result['median_ms']:>10.2f} {result['matches']:>8}  "
+                          f"{', '.join(result['scans'])}")
+
+        # Leave the real data as it was
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Single-flight coalescing check and burst timing.
+
+First checks SingleFlight itself: concurrent callers of one key share a
+single call, a leader's exception reaches every waiter, and a waiter past
+the timeout raises SingleFlightTimeout. Then seeds (or reuses) the load
+test's scratch schema and fires bursts of identical facet and exact-count
+page requests from --concurrency threads at once, with and without
+coalescing (query cache off, so every burst misses), reporting the queries
+actually run and the burst wall time. Exits non-zero when a check fails.
+
+Usage:
+    cd server && python benchmarks/single_flight_burst.py --rows 100000 --concurrency 32
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+from database import HousingDatabase
+from common import scratch_dsn, seed
+from single_flight import SingleFlight, SingleFlightTimeout
+
+WORKLOADS = {
+    'facets': lambda db: db.get_housing_facets({}),
+    'page_exact_total': lambda db: db.get_housing_page({'max_price': 1000}, total='exact'),
+}
+
+
+def burst(concurrency: int, fn) -> list:
+    """Results of fn from concurrency threads released together; exceptions are returned, not raised"""
+    barrier = threading.Barrier(concurrency)
+
+    def call():
+        barrier.wait()
+        try:
+            return fn()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(lambda _: call(), range(concurrency)))
+
+
+def check_semantics(concurrency: int) -> list:
+    """Failure messages from the sharing, error and timeout checks"""
+    failures = []
+    flight = SingleFlight(timeout=5)
+    calls = []
+
+    def slow_value():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'value': 42}
+
+    results = burst(concurrency, lambda: flight.do('same', slow_value))
+    if len(calls) != 1 or any(result is not results[0] for result in results):
+        failures.append(f"sharing: {len(calls)} calls for {concurrency} callers")
+
+    def slow_error():
+        time.sleep(0.2)
+        raise RuntimeError('query failed')
+
+    results = burst(concurrency, lambda: flight.do('failing', slow_error))
+    if not all(isinstance(result, RuntimeError) for result in results):
+        failures.append(f"errors: {sum(isinstance(r, RuntimeError) for r in results)}/{concurrency} callers saw it")
+
+    impatient = SingleFlight(timeout=0.05)
+    results = burst(concurrency, lambda: impatient.do('stuck', lambda: time.sleep(0.5) or 'late'))
+    timed_out = sum(isinstance(result, SingleFlightTimeout) for result in results)
+    if results.count('late') != 1 or timed_out != concurrency - 1:
+        failures.append(f"timeouts: {timed_out} waiters timed out, expected {concurrency - 1}")
+
+    print(f"semantics: {flight.stats()} {impatient.stats()}")
+    return failures
+
+
+def query_count() -> int:
+    return sum(value for suffix, _, value in metrics.DB_QUERY_SECONDS.samples() if suffix == '_count')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--bursts', type=int, default=5)
+    parser.add_argument('--reseed', action='store_true')
+    args = parser.parse_args()
+
+    failures = check_semantics(args.concurrency)
+
+    base_dsn = os.environ['DATABASE_URL']
+    schema = f"load_test_{args.rows}"
+    seed(base_dsn, schema, args.rows, args.reseed)
+    os.environ['DATABASE_URL'] = scratch_dsn(base_dsn, schema)
+    # Enough connections that uncoalesced callers are limited by Postgres, not the pool
+    os.environ.setdefault('DB_POOL_MAX_SIZE', str(args.concurrency))
+
+    print(f"\n{'workload':<18} {'coalescing':<11} {'queries/burst':>14} {'burst ms':>10}")
+    for name, workload in WORKLOADS.items():
+        for single_flight in (None, SingleFlight()):
+            db = HousingDatabase(single_flight=single_flight)
+            db.open_pool()
+            workload(db)
+            queries, timings = [], []
+            for _ in range(args.bursts):
+                before = query_count()
+                started = time.perf_counter()
+                results = burst(args.concurrency, lambda: workload(db))
+                timings.append((time.perf_counter() - started) * 1000)
+                queries.append(query_count() - before)
+                errors = [result for result in results if isinstance(result, Exception)]
+                if errors:
+                    failures.append(f"{name}: {len(errors)} callers failed, first: {errors[0]!r}")
+                if any(result != results[0] for result in results):
+                    failures.append(f"{name}: callers saw different results")
+            db.close_pool()
+            print(f"{name:<18} {'on' if single_flight else 'off':<11} {statistics.mean(queries):>14.1f} "
+                  f"{statistics.median(timings):>10.1f}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"\n{'Coalescing checks passed' if not failures else f'{len(failures)} failures'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Columnar snapshot parity check and latency benchmark.
+
+Loads synthetic listings into a scratch schema (see common.scratch_dsn),
+then runs the same filters through the SQL path and the snapshot path and
+compares:
+  - every page of a keyset walk (ids, order, next cursors and exact totals)
+  - the unpaginated result and, with near=, the computed distances
+  - filtered stats
+Finally it reports median per-query latency of both paths. Exits non-zero on
+any parity failure. Requires numpy.
+
+Usage:
+    cd server && python benchmarks/snapshot_parity.py --rows 20000
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from amenities import normalize_amenities
+from database import HousingDatabase
+from common import median_ms, scratch_dsn
+from snapshot import SnapshotStore
+from synthetic_data import generate_listings
+
+SCHEMA = 'snapshot_parity'
+CAMPUS = (29.6488, -82.3433)
+
+CASES = [
+    {},
+    {'housing_type': 'on_campus'},
+    {'housing_type': 'no_such_type'},
+    {'international_friendly': True},
+    {'international_friendly': False, 'max_price': 800},
+    {'min_price': 700, 'max_price': 900},
+    {'id': 17},
+    {'amenities': normalize_amenities(['Pool', 'Gym'])},
+    {'amenities': normalize_amenities(['Pool', 'Gym']), 'amenity_match': 'all'},
+    {'amenities': ['pool', 'not_an_amenity'], 'amenity_match': 'all'},
+    {'amenities': ['not_an_amenity']},
+    {'search': 'furnished', 'search_mode': 'ilike'},
+    {'search': 'Rooftop', 'search_mode': 'ilike', 'housing_type': 'off_campus'},
+    {'sort': 'rating'},
+    {'sort': 'price_asc'},
+    {'sort': 'price_desc', 'housing_type': 'off_campus'},
+    {'sort': 'members', 'international_friendly': True},
+    {'sort': 'newest'},
+    {'sort': 'newest', 'min_price': 700},
+    {'search': 'pools', 'sort': 'price_asc'},
+    {'near': CAMPUS},
+    {'near': CAMPUS, 'sort': 'distance'},
+    {'near': CAMPUS, 'radius': 1.5, 'sort': 'distance'},
+    {'near': CAMPUS, 'radius': 3, 'international_friendly': True},
+]
+
+# Ranked full-text pages fall back to SQL, so only their stats are compared
+STATS_ONLY_CASES = [
+    {'search': 'pools'},
+    {'search': 'furnish shuttle'},
+    {'search': 'the'},
+    {'search': 'lark', 'housing_type': 'off_campus'},
+]
+
+
+def walk(db: HousingDatabase, filters, limit: int):
+    """All pages of a keyset walk as (ids, distances, next_cursor, total) tuples"""
+    pages, cursor = [], None
+    while True:
+        page = db._query_housing_page(filters, limit, cursor, 'exact')
+        pages.append((
+            [row['id'] for row in page['rows']],
+            [row.get('distance') for row in page['rows']],
+            page['next_cursor'] is not None,
+            page['total'],
+        ))
+        cursor = page['next_cursor']
+        if not cursor:
+            return pages
+
+
+def same_pages(expected, actual) -> bool:
+    """Pages match exactly, except distances, which may differ in the last float bits"""
+    if len(expected) != len(actual):
+        return False
+    for (ids, distances, *rest), (other_ids, other_distances, *other_rest) in zip(expected, actual):
+        if ids != other_ids or rest != other_rest:
+            return False
+        for distance, other in zip(distances, other_distances):
+            if (distance is None) != (other is None) or (distance is not None and not math.isclose(distance, other, rel_tol=1e-12, abs_tol=1e-9)):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    base_dsn = os.environ['DATABASE_URL']
+    admin = psycopg2.connect(base_dsn)
+    admin.autocommit = True
+    admin.cursor().execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    os.environ['DATABASE_URL'] = scratch_dsn(base_dsn, SCHEMA)
+
+    try:
+        sql_db = HousingDatabase()
+        sql_db.open_pool()
+        sql_db.init_tables()
+        print(f"Seeding {args.rows} synthetic listings...")
+        sql_db.bulk_insert_housing(list(generate_listings(args.rows)), batch_size=5000)
+        # Bulk inserts share one created_at; spread it out (keeping some ties) and
+        # blank some member counts, prices and dates so the sort orders meet ties
+        # and NULLs
+        admin.cursor().execute(f"""
+            UPDATE {SCHEMA}.housing SET
+                created_at = CASE WHEN id % 401 = 0 THEN NULL ELSE
+                    created_at - (id % 997) * interval '1 second' - (id % 13) * interval '1 microsecond' END,
+                member_count = NULLIF(member_count, 10),
+                avg_price = CASE WHEN id % 211 = 0 THEN NULL ELSE avg_price END
+        """)
+
+        snapshot_db = HousingDatabase(pool=sql_db.pool, snapshots=SnapshotStore())
+        started = time.perf_counter()
+        snapshot_db.snapshots.snapshot(snapshot_db)
+        print(f"Snapshot loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        failures = 0
+        for filters in CASES:
+            checks = {
+                'pages': same_pages(walk(sql_db, filters, args.page_size), walk(snapshot_db, filters, args.page_size)),
+                'all': same_pages(walk(sql_db, filters, args.rows + 1), walk(snapshot_db, filters, args.rows + 1)),
+                'stats': sql_db._query_housing_stats(filters) == snapshot_db._query_housing_stats(filters),
+            }
+            failures += not all(checks.values())
+            print(f"{'ok  ' if all(checks.values()) else 'FAIL'} {filters} "
+                  + ' '.join(name for name, passed in checks.items() if not passed))
+        for filters in STATS_ONLY_CASES:
+            passed = sql_db._query_housing_stats(filters) == snapshot_db._query_housing_stats(filters)
+            failures += not passed
+            print(f"{'ok  ' if passed else 'FAIL'} {filters} (stats)")
+
+        print(f"\n{'filters':<70} {'sql us':>10} {'snapshot us':>12}")
+        for filters in CASES[:9] + CASES[-2:]:
+            sql_us = median_ms(lambda: sql_db._query_housing_page(filters, 50, None, 'exact'), args.repeat) * 1000
+            snapshot_us = median_ms(lambda: snapshot_db._query_housing_page(filters, 50, None, 'exact'), args.repeat) * 1000
+            print(f"{str(filters)[:70]:<70} {sql_us:>10.0f} {snapshot_us:>12.0f}")
+
+        print(f"\n{'Parity check passed' if not failures else f'{failures} parity failures'}; "
+              f"snapshot {snapshot_db.snapshot_stats()}")
+        sql_db.close_pool()
+    finally:
+        admin.cursor().execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.close()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
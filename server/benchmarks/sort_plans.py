@@ -0,0 +1,162 @@
+"""
+Sort order plan check and top-k timing.
+
+Seeds (or reuses) the load test's scratch schema, migrates it, and for every
+sort= option, with and without a housing_type filter, on the first page, the
+second and one --deep-offset rows in, EXPLAINs the page query both as plain
+SQL and as the prepared statement the API runs. Fails when a plan contains a
+Sort node or does not read one of the sort's indexes (migration 8), when a
+deep page's index scan has no Index Cond on the leading sort key, so it
+would read every row before the cursor, or when either variant returns other
+rows than OFFSET on the unpaginated order. Then times each shape with the
+indexes and, inside a rolled-back transaction, with migration 8 undone, to
+show the top-k read in index order against a sort of the filtered set.
+
+Usage:
+    cd server && python benchmarks/sort_plans.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import HousingDatabase, encode_cursor
+from common import query_ms, scratch_dsn, seed
+from prepared_statements import PreparedStatements
+
+# Indexes that serve each sort, without and with housing_type in front
+SORT_INDEXES = {
+    'rating': {'idx_housing_list_order', 'idx_housing_type_list_order'},
+    'price_asc': {'idx_housing_price_order', 'idx_housing_type_price_order'},
+    'price_desc': {'idx_housing_price_order', 'idx_housing_type_price_order'},
+    'members': {'idx_housing_members_order', 'idx_housing_type_members_order'},
+    'newest': {'idx_housing_newest', 'idx_housing_type_newest'},
+}
+
+# Migration 8 undone, for the timing baseline
+WITHOUT_SORT_INDEXES = """
+    DROP INDEX idx_housing_type_list_order, idx_housing_price_order, idx_housing_type_price_order,
+        idx_housing_members_order, idx_housing_type_members_order, idx_housing_newest, idx_housing_type_newest;
+    CREATE INDEX idx_housing_type ON housing(housing_type);
+    CREATE INDEX idx_housing_price ON housing(avg_price);
+    ANALYZE housing;
+"""
+
+
+def plan_nodes(plan: Dict) -> List[tuple]:
+    """(node type, index name, index condition) for every node of an EXPLAIN (FORMAT JSON) plan.
+    
+    A Sort over Limit nodes (the NULL tail of an ascending deep page, see
+    _page_query) only sorts a few pages of rows and is reported as 'Top Sort'.
+    """
+    children = [node for child in plan.get('Plans', []) for node in plan_nodes(child)]
+    node_type = plan['Node Type']
+    if node_type == 'Sort' and any(node == 'Limit' for node, _, _ in children):
+        node_type = 'Top Sort'
+    return [(node_type, plan.get('Index Name'), plan.get('Index Cond'))] + children
+
+
+def explain(cur, query: str, params) -> List[tuple]:
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    return plan_nodes(cur.fetchone()['QUERY PLAN'][0]['Plan'])
+
+
+def ordered_rows(db: HousingDatabase, filters: Dict, offset: int, count: int) -> List[Dict]:
+    """count rows of the unpaginated order, starting offset rows in"""
+    query, params, _, _ = db._page_query(filters, None, None)
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query + " OFFSET %(offset)s LIMIT %(count)s", {**params, 'offset': offset, 'count': count})
+            return cur.fetchall()
+
+
+def deep_cursor(db: HousingDatabase, filters: Dict, offset: int) -> Optional[str]:
+    """Cursor of the row offset rows into the order, as held by a client that paged that far"""
+    rows = ordered_rows(db, filters, offset, 1)
+    order = db._page_query(filters, None, None)[3]
+    return encode_cursor([rows[0][column] for column, _ in order]) if rows else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--deep-offset', type=int, help="rows before the deep page (default: a quarter of --rows)")
+    parser.add_argument('--reseed', action='store_true')
+    args = parser.parse_args()
+
+    base_dsn = os.environ['DATABASE_URL']
+    schema = f"load_test_{args.rows}"
+    seed(base_dsn, schema, args.rows, args.reseed)
+    os.environ['DATABASE_URL'] = scratch_dsn(base_dsn, schema)
+
+    statements = PreparedStatements()
+    db = HousingDatabase(statements=statements)
+    db.open_pool()
+    db.init_tables()
+
+    deep_offset = args.deep_offset if args.deep_offset is not None else args.rows // 4
+    shapes = []
+    for sort in SORT_INDEXES:
+        for filters in ({'sort': sort}, {'sort': sort, 'housing_type': 'off_campus'}):
+            next_cursor = db._query_housing_page(filters, args.limit, None, 'none')['next_cursor']
+            # (label, cursor, rows before the page)
+            pages = [('', None, 0), (' next page', next_cursor, args.limit),
+                     (' deep page', deep_cursor(db, filters, deep_offset), deep_offset + 1)]
+            for page, cursor, offset in pages:
+                if page and cursor is None:
+                    raise SystemExit(f"FAIL {filters}{page}: not enough rows, raise --rows")
+                query, params, _, order = db._page_query(filters, args.limit, cursor)
+                expected_ids = [row['id'] for row in ordered_rows(db, filters, offset, args.limit + 1)]
+                shapes.append((f"{filters}{page}", sort, query, params, order[0][0] if page == ' deep page' else None,
+                               expected_ids))
+
+    failures = []
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            for label, sort, query, params, seek_key, expected_ids in shapes:
+                execute, execute_params = statements.bind(cur, 'page', query, params)
+                if not execute.startswith('EXECUTE '):
+                    failures.append(f"{label}: not prepared")
+                for _ in range(6):
+                    # Past the custom-plan runs, so EXPLAIN shows the plan the API keeps using
+                    cur.execute(execute, execute_params)
+                for variant, sql, sql_params in (('plain', query, params), ('prepared', execute, execute_params)):
+                    cur.execute(sql, sql_params)
+                    if [row['id'] for row in cur.fetchall()] != expected_ids:
+                        failures.append(f"{label} ({variant}): rows differ from OFFSET {expected_ids[:3]}...")
+                for variant, nodes in (('plain', explain(cur, query, params)),
+                                       ('prepared', explain(cur, execute, execute_params))):
+                    indexes = {index for _, index, _ in nodes if index}
+                    if any(node == 'Sort' for node, _, _ in nodes):
+                        failures.append(f"{label} ({variant}): plan sorts: {nodes}")
+                    elif not indexes & SORT_INDEXES[sort]:
+                        failures.append(f"{label} ({variant}): reads {sorted(indexes) or 'no index'}")
+                    elif seek_key and not any(index in SORT_INDEXES[sort] and seek_key in (condition or '')
+                                              for _, index, condition in nodes):
+                        failures.append(f"{label} ({variant}): no Index Cond on {seek_key}, scans from the start")
+
+            with_indexes = [query_ms(cur, query, params, args.repeat) for _, _, query, params, *_ in shapes]
+            cur.execute(WITHOUT_SORT_INDEXES)
+            without_indexes = [query_ms(cur, query, params, args.repeat) for _, _, query, params, *_ in shapes]
+            conn.rollback()
+
+    db.close_pool()
+
+    print(f"{'shape':<62} {'indexed ms':>11} {'sorted ms':>10}")
+    for (label, *_), indexed, sorted_ms in zip(shapes, with_indexes, without_indexes):
+        print(f"{label[:62]:<62} {indexed:>11.2f} {sorted_ms:>10.2f}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"\n{'No sorted shape needs a Sort node' if not failures else f'{len(failures)} failures'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+API startup time benchmark.
+
+For each run, measures in fresh processes:
+  - import: time to `import api`, and whether heavy modules (scraper, NumPy) were loaded
+  - first request: time from spawning uvicorn to the first 200 from /api/health,
+    which includes interpreter start, imports, the startup hook (pool + schema
+    version check) and serving the request
+
+Usage:
+    cd server && python benchmarks/startup_time.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the refresh path needs; none should load when the API starts
+HEAVY_MODULES = ['housing_scraper', 'trafilatura', 'lxml', 'requests', 'numpy']
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import api
+elapsed = time.perf_counter() - started
+print(json.dumps({{'import_ms': elapsed * 1000, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import() -> dict:
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=SERVER_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_first_request(timeout: float = 30.0) -> float:
+    """Milliseconds from spawning uvicorn to the first successful /api/health"""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1).ok:
+                    return (time.perf_counter() - started) * 1000
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"API did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    first_requests = [measure_first_request() for _ in range(args.runs)]
+
+    loaded = sorted({module for probe in imports for module in probe['loaded']})
+    print(f"import api:           median {statistics.median(p['import_ms'] for p in imports):7.1f} ms")
+    print(f"spawn to first reply: median {statistics.median(first_requests):7.1f} ms "
+          f"(min {min(first_requests):.1f}, max {max(first_requests):.1f})")
+    print(f"heavy modules loaded at import: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Incremental sync check.
+
+Loads a few synthetic listings into a scratch schema, then re-syncs a set in
+which one stored listing comes back invalid, one is missing and one is
+changed. Checks that the invalid one is rejected but its stored row kept,
+that only the missing one is deleted, and that the changed one is updated.
+Also checks that a record with non-string amenity labels is rejected on its
+own by both loaders instead of aborting the load, and that a sync limited to
+some sources keeps the stored listings of the others. Finally runs refresh
+jobs with a scraper whose fetches are stubbed: a failed source must keep its
+listings and be reported, and a run where every off-campus source fails must
+end failed without syncing. Exits non-zero on any mismatch.
+
+Usage:
+    cd server && python benchmarks/sync_check.py
+"""
+
+import os
+import sys
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import HousingDatabase
+from fetcher import new_summary
+from housing_scraper import GainesvilleHousingScraper
+from common import scratch_dsn
+from refresh_jobs import RefreshJobManager
+from synthetic_data import generate_listings
+
+SCHEMA = 'sync_check'
+
+
+def stored_names(db: HousingDatabase) -> set:
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT name FROM housing")
+            return {row['name'] for row in cur.fetchall()}
+
+
+class StubScraper(GainesvilleHousingScraper):
+    """Scraper serving fixed listings per source, with some sources failing to fetch"""
+
+    def __init__(self, pages: dict, failing: set):
+        super().__init__(housing_sources={'off_campus': list(pages)})
+        self.page_cache = None
+        self.pages = pages
+        self.failing = failing
+
+    def _fetch_sources(self, urls, on_result=None, cancel_event=None):
+        return [(None, {**new_summary(url), 'error': "Connection refused" if url in self.failing else None})
+                for url in urls]
+
+    def _listings_for_page(self, url, html, summary, housing_type):
+        return [] if summary['error'] else self.pages[url]
+
+
+def run_refresh(db: HousingDatabase, scraper: StubScraper):
+    manager = RefreshJobManager(db, scraper_factory=lambda: scraper)
+    job = manager.start()
+    manager._thread.join(60)
+    return job
+
+
+def main():
+    base_dsn = os.environ['DATABASE_URL']
+    admin = psycopg2.connect(base_dsn)
+    admin.autocommit = True
+    admin.cursor().execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    os.environ['DATABASE_URL'] = scratch_dsn(base_dsn, SCHEMA)
+
+    failures = []
+    try:
+        db = HousingDatabase()
+        db.init_tables()
+        listings = list(generate_listings(5))
+        db.bulk_insert_housing(listings[:4])
+
+        invalid = {key: value for key, value in listings[0].items() if key != 'housing_type'}
+        changed = {**listings[1], 'rating': 1.0}
+        report = db.sync_housing([invalid, changed, listings[2]])
+
+        names = stored_names(db)
+        expected = {listing['name'] for listing in listings[:3]}
+        if names != expected:
+            failures.append(f"stored {sorted(names)}, expected {sorted(expected)}")
+        counts = {key: report[key] for key in ('inserted', 'updated', 'unchanged', 'deleted', 'rejected')}
+        if counts != {'inserted': 0, 'updated': 1, 'unchanged': 1, 'deleted': 1, 'rejected': 1}:
+            failures.append(f"report {counts}")
+
+        bad_amenities = {**listings[3], 'amenities': [None, 3]}
+        for loader in (db.bulk_insert_housing, db.sync_housing):
+            try:
+                report = loader([bad_amenities, listings[4]])
+            except Exception as e:
+                failures.append(f"{loader.__name__} aborted on bad amenities: {e!r}")
+                continue
+            if report['rejected'] != 1:
+                failures.append(f"{loader.__name__} rejected {report['rejected']} records, expected 1")
+
+        # A source whose fetch failed is left out of sources; its rows must survive
+        fetched, failed = 'https://fetched.example/', 'https://failed.example/'
+        db.sync_housing([{**listings[0], 'source_url': fetched}, {**listings[1], 'source_url': fetched},
+                         {**listings[2], 'source_url': failed}])
+        report = db.sync_housing([{**listings[0], 'source_url': fetched}], sources=[fetched])
+        names = stored_names(db)
+        expected = {listings[0]['name'], listings[2]['name']}
+        if names != expected or report['deleted'] != 1:
+            failures.append(f"sources sync stored {sorted(names)}, expected {sorted(expected)}; "
+                            f"deleted {report['deleted']}, expected 1")
+
+        pages = {fetched: [{**listings[0], 'source_url': fetched}], failed: [{**listings[2], 'source_url': failed}]}
+        db.sync_housing([listing for page in pages.values() for listing in page])
+        job = run_refresh(db, StubScraper(pages, {failed}))
+        names = stored_names(db)
+        if job.phase != 'completed' or listings[2]['name'] not in names:
+            failures.append(f"refresh with a failed source: {job.phase}, stored {sorted(names)}")
+        if not any(error.startswith(failed) for error in job.errors):
+            failures.append(f"refresh with a failed source: errors {job.errors}")
+
+        job = run_refresh(db, StubScraper(pages, set(pages)))
+        if job.phase != 'failed' or stored_names(db) != names:
+            failures.append(f"refresh with every source failed: {job.phase}, stored {sorted(stored_names(db))}")
+    finally:
+        admin.cursor().execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print('Sync check passed' if not failures else f"{len(failures)} sync failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
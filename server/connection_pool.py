@@ -0,0 +1,261 @@
+"""
+Bounded, thread-safe PostgreSQL connection pool used by HousingDatabase
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class PoolClosed(Exception):
+    """Raised when a connection is requested from a closed pool"""
+
+
+class HousingConnectionPool:
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10,
+                 max_lifetime: float = 1800.0, checkout_timeout: float = 10.0,
+                 ping_after: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        # Idle connections older than this are pinged with SELECT 1 on checkout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._meta: Dict[int, Dict] = {}
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'health_check_failures': 0,
+            'expired': 0,
+        }
+
+    @classmethod
+    def from_env(cls, dsn: str) -> 'HousingConnectionPool':
+        """Build a pool configured from DB_POOL_* environment variables"""
+        return cls(
+            dsn,
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+            checkout_timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            ping_after=float(os.getenv('DB_POOL_PING_AFTER', 30)),
+        )
+
+    def open(self):
+        """Open the pool and pre-create min_size connections"""
+        with self._cond:
+            self._closed = False
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+
+        for _ in range(max(missing, 0)):
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(conn)
+                self._cond.notify()
+
+    def close(self):
+        """Close every idle connection; in-use connections are closed when returned"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+        for conn in idle:
+            self._discard(conn)
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a healthy connection, waiting up to timeout seconds"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            conn = None
+            create = False
+
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("Connection pool is closed")
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            wait_time = time.monotonic() - started
+            with self._cond:
+                self._in_use += 1
+                self._metrics['checkouts'] += 1
+                if waited:
+                    self._metrics['waits'] += 1
+                self._metrics['wait_time_total'] += wait_time
+                self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], wait_time)
+            return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection to the pool"""
+        with self._cond:
+            self._in_use -= 1
+
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+
+        if discard or conn.closed or self._closed or self._is_expired(conn):
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._meta[id(conn)]['last_used'] = time.monotonic()
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Check out a connection for the duration of a with-block.
+
+        Commits on success and rolls back on error, like psycopg2's own
+        connection context manager.
+        """
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            with conn:
+                yield conn
+        except (psycopg2.InterfaceError, psycopg2.OperationalError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard or conn.closed)
+
+    def stats(self) -> Dict:
+        """Current pool occupancy and cumulative checkout metrics"""
+        with self._cond:
+            checkouts = self._metrics['checkouts']
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self._metrics,
+                'wait_time_avg': self._metrics['wait_time_total'] / checkouts if checkouts else 0.0,
+            }
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        now = time.monotonic()
+        with self._cond:
+            self._meta[id(conn)] = {'created_at': now, 'last_used': now}
+            self._metrics['connections_created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._meta.pop(id(conn), None)
+            self._size -= 1
+            self._metrics['connections_closed'] += 1
+            self._cond.notify()
+
+    def _is_expired(self, conn) -> bool:
+        meta = self._meta.get(id(conn))
+        if meta is None:
+            return True
+        expired = self.max_lifetime > 0 and time.monotonic() - meta['created_at'] > self.max_lifetime
+        if expired:
+            with self._cond:
+                self._metrics['expired'] += 1
+        return expired
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed or self._is_expired(conn):
+            return False
+
+        idle_for = time.monotonic() - self._meta[id(conn)]['last_used']
+        if idle_for < self.ping_after:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._cond:
+                self._metrics['health_check_failures'] += 1
+            return False
@@ -1,159 +1,1077 @@
 import os
+import base64
+import math
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import json
-from typing import List, Dict, Optional
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, Optional
+
+from amenities import normalize_amenities
+from connection_pool import HousingConnectionPool
+from geocoding import EARTH_RADIUS_MILES, geocode
+from metrics import (DB_CONNECTION_ACQUIRE_SECONDS, DB_FETCH_SECONDS, DB_QUERY_SECONDS, DB_SLOW_QUERIES,
+                     DB_TRANSFORM_SECONDS)
+from migrations import LATEST_VERSION, migrate
+from prepared_statements import PreparedStatements
+from query_cache import QueryCache, cache_key
+from request_timing import db_timer
+from single_flight import SingleFlight
+
+
+# Columns written by the insert paths, in VALUES order
+HOUSING_COLUMNS = [
+    'name', 'location', 'price_range', 'avg_price', 'housing_type',
+    'is_international_friendly', 'amenities', 'source_url',
+    'distance_to_campus', 'bus_routes', 'description',
+    'rating', 'member_count', 'image_url', 'latitude', 'longitude'
+]
+ROW_PLACEHOLDERS = ', '.join(['%s'] * len(HOUSING_COLUMNS))
+
+# Natural key of a listing, used by sync_housing to match scraped records to
+# stored rows. Backed by the unique index idx_housing_natural_key (migration 6).
+NATURAL_KEY = "(COALESCE(source_url, '')), name"
+
+# Columns returned to callers; excludes internal columns such as search_vector
+# and grid_cell
+SELECT_COLUMNS = ', '.join(['id'] + HOUSING_COLUMNS + ['created_at', 'updated_at'])
+
+# Insert-or-update on the natural key. Rows whose values are unchanged are not
+# touched (no new row version, updated_at kept) and are not returned; xmax = 0
+# tells a fresh insert apart from an update.
+_UPDATABLE_COLUMNS = [column for column in HOUSING_COLUMNS if column not in ('name', 'source_url')]
+UPSERT_SQL = (
+    f"INSERT INTO housing ({', '.join(HOUSING_COLUMNS)}) VALUES {{values}} "
+    f"ON CONFLICT ({NATURAL_KEY}) DO UPDATE SET "
+    + ', '.join(f"{column} = EXCLUDED.{column}" for column in _UPDATABLE_COLUMNS)
+    + ", updated_at = CURRENT_TIMESTAMP "
+    f"WHERE ({', '.join('housing.' + column for column in _UPDATABLE_COLUMNS)}) "
+    f"IS DISTINCT FROM ({', '.join('EXCLUDED.' + column for column in _UPDATABLE_COLUMNS)}) "
+    "RETURNING id, (xmax = 0) AS inserted"
+)
+
+# Listing order for keyset pagination; id makes the order total. Backed by
+# idx_housing_list_order.
+LIST_ORDER = [('rating', 'DESC'), ('avg_price', 'ASC'), ('id', 'ASC')]
+# Sort keys that are computed rather than stored. ts_rank is cast to float8
+# so the value round-trips exactly through a cursor.
+ORDER_EXPRESSIONS = {
+    'search_rank': "ts_rank(search_vector, to_tsquery('english', %(search_query)s))::float8",
+    # Haversine miles from the near= point; NULL for listings without coordinates
+    'distance': (
+        f"{2 * EARTH_RADIUS_MILES} * ASIN(SQRT("
+        "POWER(SIN(RADIANS(latitude - %(near_lat)s) / 2), 2) + "
+        "COS(RADIANS(%(near_lat)s)) * COS(RADIANS(latitude)) * POWER(SIN(RADIANS(longitude - %(near_lon)s) / 2), 2)"
+        "))"
+    ),
+}
+DISTANCE_ORDER = [('distance', 'ASC'), ('id', 'ASC')]
+# Orders selectable with sort=. Each is backed by an index on its keys and
+# one with housing_type in front (migration 8), so a page reads rows in index
+# order instead of sorting the filtered set. price_desc reads the price index
+# backwards.
+SORT_ORDERS = {
+    'rating': LIST_ORDER,
+    'price_asc': [('avg_price', 'ASC'), ('id', 'ASC')],
+    'price_desc': [('avg_price', 'DESC'), ('id', 'DESC')],
+    'members': [('member_count', 'DESC'), ('id', 'ASC')],
+    'newest': [('created_at', 'DESC'), ('id', 'DESC')],
+    'distance': DISTANCE_ORDER,
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Most ids one get_housing_by_ids call resolves
+MAX_BATCH_IDS = 100
+# Rows per round trip when streaming with iter_housing
+EXPORT_FETCH_SIZE = 1000
+
+# Radius search probes idx_housing_grid_cell with the 0.01 degree cells covering
+# the search box (see migration 7); past this many cells a plain bounding-box
+# filter is used instead
+MAX_GRID_CELLS = 400
+MILES_PER_DEGREE_LAT = 69.0
+
+# Single-pass aggregate behind /api/housing/stats; housing_stats_summary
+# (migration 5) materializes the same query for the unfiltered case
+STATS_QUERY = """
+    SELECT
+        COUNT(*) AS total_listings,
+        COUNT(*) FILTER (WHERE housing_type = 'on_campus') AS on_campus_count,
+        COUNT(*) FILTER (WHERE housing_type = 'off_campus') AS off_campus_count,
+        COUNT(*) FILTER (WHERE is_international_friendly) AS international_friendly_count,
+        COALESCE(MIN(avg_price), 0) AS min_price,
+        COALESCE(MAX(avg_price), 0) AS max_price,
+        COALESCE(FLOOR(AVG(avg_price)), 0)::INTEGER AS avg_price
+    FROM housing
+"""
+
+
+# Facet counts behind /api/housing/facets from one statement: a single
+# GROUPING SETS aggregate yields the total and the housing type, international
+# and price bucket counts (width_bucket: 0 below the first bound), and one
+# grouped unnest counts amenities. NULL values form their own groups, which the
+# caller skips. Stored amenity arrays hold unique keys, so no DISTINCT is needed.
+FACETS_QUERY = """
+    SELECT
+        CASE WHEN GROUPING(housing_type) = 0 THEN 'housing_type'
+             WHEN GROUPING(is_international_friendly) = 0 THEN 'international_friendly'
+             WHEN GROUPING(price_bucket) = 0 THEN 'price'
+             ELSE 'total' END AS facet,
+        COALESCE(housing_type, is_international_friendly::text, price_bucket::text) AS value,
+        COUNT(*) AS count
+    FROM (
+        SELECT housing_type, is_international_friendly,
+               width_bucket(avg_price, %(price_bounds)s::integer[]) AS price_bucket
+        FROM housing {where}
+    ) AS matched
+    GROUP BY GROUPING SETS ((), (housing_type), (is_international_friendly), (price_bucket))
+    UNION ALL
+    SELECT 'amenity', amenity, COUNT(*) FROM housing CROSS JOIN LATERAL unnest(amenities) AS amenity
+    {where} GROUP BY amenity
+"""
+# Upper bounds of the default price buckets: under 600, 600-799, ..., 1200 and up
+DEFAULT_PRICE_BUCKETS = [600, 800, 1000, 1200]
+MAX_PRICE_BUCKETS = 20
+
+# pg advisory lock key serializing sync_housing runs across processes
+SYNC_LOCK_KEY = 0x486F7573  # 'Hous'
+
+
+class SyncCancelled(Exception):
+    """Raised by sync_housing when cancelled; the transaction is rolled back"""
+
+
+class ExportsBusy(Exception):
+    """Raised by iter_housing when the concurrent export limit is reached"""
+
+
+class _ExportStream:
+    """Iterator over exported rows that holds an export slot until it is
+    exhausted, fails, is closed or is garbage collected (even unstarted)"""
+    
+    def __init__(self, rows: Iterator[Dict], slots: threading.BoundedSemaphore):
+        self._rows = rows
+        self._slots = slots
+        self._released = False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> Dict:
+        try:
+            return next(self._rows)
+        except BaseException:
+            self.close()
+            raise
+    
+    def close(self):
+        if not self._released:
+            self._released = True
+            try:
+                self._rows.close()
+            finally:
+                self._slots.release()
+    
+    def __del__(self):
+        self.close()
+
+
+def _cursor_value(value):
+    if isinstance(value, datetime):
+        # Postgres compares the ISO text with the timestamp column as a timestamp
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(values: List) -> str:
+    """Encode the sort-key values of the last row on a page as an opaque cursor"""
+    payload = json.dumps(values, separators=(',', ':'), default=_cursor_value).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _keyset_predicate(order: List[tuple], values: List) -> tuple:
+    """Build a 'sorts after the cursor row' predicate for a mixed-direction order.
+    
+    Expands to (a after) OR (a equal AND b after) OR ... Nulls follow Postgres
+    defaults: last for ASC, first for DESC.
+    """
+    params = {}
+    branches = []
+    equal_parts = []
+    
+    for position, ((name, direction), value) in enumerate(zip(order, values)):
+        column = ORDER_EXPRESSIONS.get(name, name)
+        key = f"keyset_{position}"
+        params[key] = value
+        
+        if value is None:
+            after = "FALSE" if direction == 'ASC' else f"{column} IS NOT NULL"
+            equal = f"{column} IS NULL"
+        elif direction == 'ASC':
+            after = f"({column} > %({key})s OR {column} IS NULL)"
+            equal = f"{column} = %({key})s"
+        else:
+            after = f"{column} < %({key})s"
+            equal = f"{column} = %({key})s"
+        
+        branches.append(" AND ".join(equal_parts + [after]))
+        equal_parts.append(equal)
+    
+    return "(" + " OR ".join(f"({branch})" for branch in branches) + ")", params
+
+
+def _keyset_bound(order: List[tuple], values: List) -> Optional[str]:
+    """Redundant range condition on the leading sort key, so the index behind
+    the order seeks to the cursor instead of reading every earlier row.
+    
+    When id follows in the same direction the bound is a row comparison on
+    both, which also seeks past the rows tied on the leading key. For an
+    ascending key with a non-null cursor value it leaves out the trailing
+    NULLs, which _page_query reads separately. None when the key is computed
+    or a DESC cursor sits in the leading NULLs.
+    """
+    name, direction = order[0]
+    if name in ORDER_EXPRESSIONS:
+        return None
+    if values[0] is None:
+        return f"{name} IS NULL" if direction == 'ASC' else None
+    operator = '>=' if direction == 'ASC' else '<='
+    if order[1:] == [('id', direction)]:
+        return f"({name}, id) {operator} (%(keyset_0)s, %(keyset_1)s)"
+    return f"{name} {operator} %(keyset_0)s"
+
+
+def list_order(filters: Optional[Dict]) -> List[tuple]:
+    """Sort keys for a query: the requested sort, else ranked matches first for
+    full-text searches, else LIST_ORDER"""
+    sort = filters.get('sort') if filters else None
+    if sort:
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_ORDERS)}")
+        return SORT_ORDERS[sort]
+    if filters and filters.get('search') and filters.get('search_mode', 'fts') == 'fts' \
+            and prefix_tsquery(filters['search']):
+        return [('search_rank', 'DESC')] + LIST_ORDER
+    return LIST_ORDER
+
+
+def prefix_tsquery(text: str) -> Optional[str]:
+    """Turn free text into a tsquery matching every word as a prefix ('gym:* & pool:*')"""
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    return ' & '.join(f"{word}:*" for word in words) or None
+
+
+def grid_cells(lat: float, lon: float, radius: float) -> tuple:
+    """Bounding box (min_lat, max_lat, min_lon, max_lon) of a radius search, and
+    the grid_cell values covering it, or None when there would be too many"""
+    lat_delta = radius / MILES_PER_DEGREE_LAT
+    lon_delta = radius / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+    box = (lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta)
+    
+    lat_cells = range(math.floor(box[0] * 100), math.floor(box[1] * 100) + 1)
+    lon_cells = range(math.floor(box[2] * 100), math.floor(box[3] * 100) + 1)
+    if len(lat_cells) * len(lon_cells) > MAX_GRID_CELLS:
+        return box, None
+    return box, [lat_cell * 100000 + lon_cell for lat_cell in lat_cells for lon_cell in lon_cells]
+
+
+def filter_shape(filters: Optional[Dict]) -> str:
+    """Metric label for a filter combination: the sorted filter names, without values"""
+    names = sorted(name for name, value in (filters or {}).items() if value not in (None, '', []))
+    return '+'.join(names) or 'none'
+
+
+def validate_price_buckets(bounds: List[int]) -> List[int]:
+    """Check price bucket bounds are strictly ascending and not too many"""
+    if not bounds or len(bounds) > MAX_PRICE_BUCKETS:
+        raise ValueError(f"price_buckets needs 1 to {MAX_PRICE_BUCKETS} bounds")
+    if any(low >= high for low, high in zip(bounds, bounds[1:])):
+        raise ValueError("price_buckets must be strictly ascending")
+    return list(bounds)
+
+
+def facet_result(total: int, housing_types: Dict[str, int], international: Dict[str, int],
+                 amenities: Dict[str, int], price_counts: Dict[int, int], bounds: List[int]) -> Dict:
+    """Facet counts in response form. Price bucket i covers prices from
+    bounds[i-1] up to bounds[i] - 1 (both inclusive, prices are whole dollars),
+    matching the list endpoint's min_price/max_price filters."""
+    edges = [None] + list(bounds) + [None]
+    return {
+        'total': total,
+        'housing_type': dict(sorted(housing_types.items())),
+        'international_friendly': {'true': international.get('true', 0), 'false': international.get('false', 0)},
+        'amenities': dict(sorted(amenities.items(), key=lambda item: (-item[1], item[0]))),
+        'price_buckets': [
+            {
+                'min': edges[index],
+                'max': edges[index + 1] - 1 if edges[index + 1] is not None else None,
+                'count': price_counts.get(index, 0)
+            }
+            for index in range(len(bounds) + 1)
+        ]
+    }
+
+
+def _name_hash(name: str) -> int:
+    return zlib.crc32(name.encode('utf-8'))
+
+
+def _record_name(housing) -> str:
+    return housing.get('name', 'Unknown') if isinstance(housing, dict) else 'Unknown'
 
 
 class HousingDatabase:
-    def __init__(self):
+    def __init__(self, pool: Optional[HousingConnectionPool] = None, cache: Optional[QueryCache] = None,
+                 snapshots=None, single_flight: Optional[SingleFlight] = None,
+                 statements: Optional[PreparedStatements] = None):
+        # Checked on first connection rather than here, so the API module can be
+        # imported (and report the problem) without a configured database
         self.db_url = os.getenv('DATABASE_URL')
+        self.pool = pool
+        self.cache = cache
+        # Optional snapshot.SnapshotStore serving reads from an in-process columnar copy
+        self.snapshots = snapshots
+        # Optional coalescing of identical concurrent reads into one query
+        self.single_flight = single_flight
+        # Optional registry running page and count queries as prepared statements (pooled mode only)
+        self.statements = statements
+        # How long a data version read from housing_data_version is trusted
+        self.version_check_interval = float(os.getenv('HOUSING_VERSION_CHECK_INTERVAL', 1.0))
+        # Read queries slower than this are logged with their SQL and parameters; 0 disables
+        self.slow_query_ms = float(os.getenv('HOUSING_SLOW_QUERY_MS', 0))
+        self._data_version: Optional[int] = None
+        self._data_changed_at = None
+        self._version_checked_at = 0.0
+        self._export_slots: Optional[threading.BoundedSemaphore] = None
+        self._init_export_slots()
+    
+    def open_pool(self):
+        """Switch to pooled mode, configured from DB_POOL_* environment variables"""
+        if self.pool is None:
+            self.pool = HousingConnectionPool.from_env(self._require_db_url())
+            self._init_export_slots()
+        self.pool.open()
+    
+    def _init_export_slots(self):
+        """Cap concurrent exports below the pool size (HOUSING_MAX_EXPORTS, default
+        a quarter of it): each holds a pooled connection for its whole stream, and
+        without a cap slow export clients would starve every other endpoint"""
+        if self.pool is None:
+            return
+        limit = int(os.getenv('HOUSING_MAX_EXPORTS', max(1, self.pool.max_size // 4)))
+        self.max_exports = max(1, min(limit, self.pool.max_size - 1))
+        self._export_slots = threading.BoundedSemaphore(self.max_exports)
+    
+    def _require_db_url(self) -> str:
         if not self.db_url:
-            raise ValueError("DATABASE_URL environment variable is required")
+            raise RuntimeError("DATABASE_URL environment variable is required")
+        return self.db_url
+    
+    def close_pool(self):
+        """Close the connection pool, if one is open"""
+        if self.pool is not None:
+            self.pool.close()
+    
+    def pool_stats(self) -> Optional[Dict]:
+        """Connection pool metrics, or None when running unpooled"""
+        return self.pool.stats() if self.pool is not None else None
     
+    @contextmanager
     def get_connection(self):
-        """Get database connection"""
-        return psycopg2.connect(self.db_url, cursor_factory=RealDictCursor)
+        """Get database connection (from the pool when one is open)"""
+        with db_timer():
+            started = time.perf_counter()
+            if self.pool is not None:
+                with self.pool.connection() as conn:
+                    DB_CONNECTION_ACQUIRE_SECONDS.observe(time.perf_counter() - started)
+                    yield conn
+                return
+            
+            conn = psycopg2.connect(self._require_db_url(), cursor_factory=RealDictCursor)
+            DB_CONNECTION_ACQUIRE_SECONDS.observe(time.perf_counter() - started)
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
     
     def init_tables(self):
-        """Initialize database tables for housing data"""
+        """Bring the schema up to date; a single version check when nothing is pending"""
         with self.get_connection() as conn:
-            with conn.cursor() as cur:
-                # Create housing table
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS housing (
-                        id SERIAL PRIMARY KEY,
-                        name VARCHAR(255) NOT NULL,
-                        location VARCHAR(255),
-                        price_range VARCHAR(100),
-                        avg_price INTEGER,
-                        housing_type VARCHAR(50) NOT NULL,
-                        is_international_friendly BOOLEAN DEFAULT FALSE,
-                        amenities TEXT[], -- PostgreSQL array type
-                        source_url VARCHAR(500),
-                        distance_to_campus VARCHAR(100),
-                        bus_routes TEXT[],
-                        description TEXT,
-                        rating FLOAT DEFAULT 4.0,
-                        member_count INTEGER DEFAULT 0,
-                        image_url VARCHAR(500),
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-                
-                # Create index for faster queries
-                cur.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_housing_type ON housing(housing_type);
-                    CREATE INDEX IF NOT EXISTS idx_housing_international ON housing(is_international_friendly);
-                    CREATE INDEX IF NOT EXISTS idx_housing_price ON housing(avg_price);
-                """)
-                
-                conn.commit()
-                print("Database tables initialized successfully")
+            applied = migrate(conn)
+        
+        if applied:
+            print(f"Database schema migrated to version {applied[-1]}")
+        else:
+            print(f"Database schema up to date (version {LATEST_VERSION})")
     
     def insert_housing(self, housing_data: Dict) -> int:
         """Insert a single housing record"""
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO housing (
-                        name, location, price_range, avg_price, housing_type,
-                        is_international_friendly, amenities, source_url,
-                        distance_to_campus, bus_routes, description,
-                        rating, member_count, image_url
-                    ) VALUES (
-                        %(name)s, %(location)s, %(price_range)s, %(avg_price)s,
-                        %(housing_type)s, %(is_international_friendly)s,
-                        %(amenities)s, %(source_url)s, %(distance_to_campus)s,
-                        %(bus_routes)s, %(description)s, %(rating)s,
-                        %(member_count)s, %(image_url)s
-                    ) RETURNING id;
-                """, {
-                    **housing_data,
-                    'rating': housing_data.get('rating', 4.0 + (hash(housing_data['name']) % 10) / 10),
-                    'member_count': housing_data.get('member_count', 20 + (hash(housing_data['name']) % 40)),
-                    'image_url': housing_data.get('image_url', self._get_default_image_url(housing_data['housing_type']))
-                })
+                cur.execute(
+                    f"INSERT INTO housing ({', '.join(HOUSING_COLUMNS)}) VALUES ({ROW_PLACEHOLDERS}) RETURNING id;",
+                    self._housing_row(housing_data)
+                )
                 
                 result = cur.fetchone()
                 if result:
                     housing_id = int(result['id'])
+                    self._mark_data_changed(cur)
                     conn.commit()
+                    self._data_change_committed()
                     return housing_id
                 else:
                     raise ValueError("Failed to insert housing record")
     
-    def bulk_insert_housing(self, housing_list: List[Dict]):
-        """Insert multiple housing records"""
-        for housing in housing_list:
-            try:
-                self.insert_housing(housing)
-                print(f"Inserted: {housing['name']}")
-            except Exception as e:
-                print(f"Error inserting {housing.get('name', 'Unknown')}: {str(e)}")
-    
-    def get_all_housing(self, filters: Optional[Dict] = None) -> List[Dict]:
-        """Get all housing with optional filters"""
+    def bulk_insert_housing(self, housing_list: List[Dict], batch_size: int = 500, replace: bool = False) -> Dict:
+        """Insert multiple housing records in a single transaction.
+        
+        Rows are sent as multi-row INSERT ... VALUES batches. If a batch fails,
+        it is retried row by row under savepoints so one bad record is rejected
+        without aborting the load. With replace=True the existing rows are
+        deleted in the same transaction, so readers never see an empty table.
+        """
+        report = {'inserted': 0, 'rejected': 0, 'batches': []}
+        insert_sql = f"INSERT INTO housing ({', '.join(HOUSING_COLUMNS)}) VALUES %s"
+        
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                base_query = """
-                    SELECT * FROM housing 
-                    WHERE 1=1
-                """
-                params = {}
+                if replace:
+                    cur.execute("DELETE FROM housing;")
                 
-                if filters:
-                    # Filter by housing type
-                    if filters.get('housing_type'):
-                        base_query += " AND housing_type = %(housing_type)s"
-                        params['housing_type'] = filters['housing_type']
-                    
-                    # Filter by international friendly
-                    if 'international_friendly' in filters:
-                        base_query += " AND is_international_friendly = %(international_friendly)s"
-                        params['international_friendly'] = filters['international_friendly']
+                for batch_number, start in enumerate(range(0, len(housing_list), batch_size), 1):
+                    batch = housing_list[start:start + batch_size]
+                    rows, errors = [], []
                     
-                    # Filter by price range
-                    if filters.get('max_price'):
-                        base_query += " AND avg_price <= %(max_price)s"
-                        params['max_price'] = filters['max_price']
+                    for housing in batch:
+                        try:
+                            rows.append((housing, self._housing_row(housing)))
+                        except (KeyError, TypeError, ValueError) as e:
+                            errors.append({'name': _record_name(housing), 'error': f"Invalid record: {e}"})
                     
-                    if filters.get('min_price'):
-                        base_query += " AND avg_price >= %(min_price)s"
-                        params['min_price'] = filters['min_price']
+                    inserted = 0
+                    if rows:
+                        cur.execute("SAVEPOINT bulk_batch")
+                        try:
+                            execute_values(cur, insert_sql, [row for _, row in rows], page_size=len(rows))
+                            cur.execute("RELEASE SAVEPOINT bulk_batch")
+                            inserted = len(rows)
+                        except psycopg2.Error:
+                            cur.execute("ROLLBACK TO SAVEPOINT bulk_batch")
+                            inserted, row_errors = self._insert_rows_isolated(cur, rows)
+                            errors.extend(row_errors)
                     
-                    # Filter by ID (for get_housing_by_id)
-                    if filters.get('id'):
-                        base_query += " AND id = %(id)s"
-                        params['id'] = filters['id']
+                    report['batches'].append({
+                        'batch': batch_number,
+                        'inserted': inserted,
+                        'rejected': len(errors),
+                        'errors': errors
+                    })
+                    report['inserted'] += inserted
+                    report['rejected'] += len(errors)
+                    print(f"Batch {batch_number}: inserted {inserted}, rejected {len(errors)}")
+                    for error in errors:
+                        print(f"Error inserting {error['name']}: {error['error']}")
+                
+                self._mark_data_changed(cur)
+                conn.commit()
+        
+        self._data_change_committed()
+        return report
+    
+    def _insert_rows_isolated(self, cur, rows: List) -> tuple:
+        """Insert rows one at a time, each under its own savepoint"""
+        insert_sql = f"INSERT INTO housing ({', '.join(HOUSING_COLUMNS)}) VALUES ({ROW_PLACEHOLDERS})"
+        inserted, errors = 0, []
+        
+        for housing, row in rows:
+            cur.execute("SAVEPOINT bulk_row")
+            try:
+                cur.execute(insert_sql, row)
+                cur.execute("RELEASE SAVEPOINT bulk_row")
+                inserted += 1
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                errors.append({'name': _record_name(housing), 'error': str(e).strip()})
+        
+        return inserted, errors
+    
+    def sync_housing(self, housing_list: List[Dict], batch_size: int = 500,
+                     cancelled: Optional[Callable[[], bool]] = None,
+                     sources: Optional[List[str]] = None) -> Dict:
+        """Incrementally bring the table in line with a freshly scraped listing set.
+        
+        Records are matched to stored rows on (source_url, name). New listings
+        are inserted, rows whose values differ are updated (bumping updated_at),
+        identical rows are left untouched, and stored listings missing from
+        housing_list are deleted. When sources is given, only stored rows from
+        those source_urls can be deleted, so a source whose fetch failed keeps
+        its listings. Everything runs in one transaction, so readers
+        keep seeing the previous data until the refresh commits, and ids stay
+        stable across refreshes. Invalid records are rejected as in
+        bulk_insert_housing; their stored rows, if any, are kept.
+        
+        Concurrent syncs, from any process, run one after another. cancelled is
+        polled between batches; if it returns True the transaction is rolled
+        back and SyncCancelled is raised.
+        """
+        report = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'rejected': 0, 'batches': [], 'errors': []}
+        
+        # Later duplicates of a key win; Postgres cannot upsert one row twice per statement
+        records, errors = {}, []
+        # Natural keys of every submitted record, rejected ones included, so an
+        # invalid re-scrape of a stored listing does not delete it
+        keep = set()
+        for housing in housing_list:
+            if isinstance(housing, dict) and isinstance(housing.get('name'), str):
+                keep.add((housing.get('source_url') or '', housing['name']))
+            try:
+                row = self._housing_row(housing)
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append({'name': _record_name(housing), 'error': f"Invalid record: {e}"})
+                continue
+            records[(housing.get('source_url') or '', housing['name'])] = (housing, row)
+        report['rejected'] = len(errors)
+        report['errors'] = errors
+        for error in errors:
+            print(f"Error syncing {error['name']}: {error['error']}")
+        
+        records = list(records.values())
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (SYNC_LOCK_KEY,))
+                
+                for batch_number, start in enumerate(range(0, len(records), batch_size), 1):
+                    if cancelled is not None and cancelled():
+                        raise SyncCancelled("Sync cancelled before commit")
                     
-                    # Search by name or location
-                    if filters.get('search'):
-                        base_query += " AND (name ILIKE %(search)s OR location ILIKE %(search)s OR description ILIKE %(search)s)"
-                        params['search'] = f"%{filters['search']}%"
+                    rows = records[start:start + batch_size]
+                    cur.execute("SAVEPOINT sync_batch")
+                    try:
+                        results = execute_values(cur, UPSERT_SQL.format(values='%s'), [row for _, row in rows],
+                                                 page_size=len(rows), fetch=True)
+                        cur.execute("RELEASE SAVEPOINT sync_batch")
+                        batch_errors = []
+                    except psycopg2.Error:
+                        cur.execute("ROLLBACK TO SAVEPOINT sync_batch")
+                        results, batch_errors = self._upsert_rows_isolated(cur, rows)
                     
-                    # Filter by amenities
-                    if filters.get('amenities'):
-                        amenity_list = filters['amenities'] if isinstance(filters['amenities'], list) else [filters['amenities']]
-                        base_query += " AND amenities && %(amenities)s"
-                        params['amenities'] = amenity_list
+                    inserted = sum(1 for result in results if result['inserted'])
+                    updated = len(results) - inserted
+                    unchanged = len(rows) - len(results) - len(batch_errors)
+                    report['batches'].append({
+                        'batch': batch_number,
+                        'inserted': inserted,
+                        'updated': updated,
+                        'unchanged': unchanged,
+                        'rejected': len(batch_errors),
+                        'errors': batch_errors
+                    })
+                    report['inserted'] += inserted
+                    report['updated'] += updated
+                    report['unchanged'] += unchanged
+                    report['rejected'] += len(batch_errors)
+                    print(f"Batch {batch_number}: inserted {inserted}, updated {updated}, "
+                          f"unchanged {unchanged}, rejected {len(batch_errors)}")
+                    for error in batch_errors:
+                        print(f"Error syncing {error['name']}: {error['error']}")
                 
-                base_query += " ORDER BY rating DESC, avg_price ASC"
+                # Every submitted key survives, including rejected updates of existing rows
+                source_urls = [source_url for source_url, _ in keep]
+                names = [name for _, name in keep]
+                # Rows of sources outside this run's successful ones are left alone
+                scope = "AND COALESCE(housing.source_url, '') = ANY(%(sources)s::text[])" if sources is not None else ""
+                cur.execute(f"""
+                    DELETE FROM housing
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM unnest(%(source_urls)s::text[], %(names)s::text[]) AS seen (source_url, name)
+                        WHERE seen.source_url = COALESCE(housing.source_url, '') AND seen.name = housing.name
+                    ) {scope}
+                """, {'source_urls': source_urls, 'names': names, 'sources': list(sources or [])})
+                report['deleted'] = cur.rowcount
+                
+                changed = report['inserted'] or report['updated'] or report['deleted']
+                if changed:
+                    self._mark_data_changed(cur)
+                conn.commit()
+        
+        if changed:
+            self._data_change_committed()
+        print(f"Sync complete: {report['inserted']} inserted, {report['updated']} updated, "
+              f"{report['unchanged']} unchanged, {report['deleted']} deleted, {report['rejected']} rejected")
+        return report
+    
+    def _upsert_rows_isolated(self, cur, rows: List) -> tuple:
+        """Upsert rows one at a time, each under its own savepoint"""
+        upsert_sql = UPSERT_SQL.format(values=f"({ROW_PLACEHOLDERS})")
+        results, errors = [], []
+        
+        for housing, row in rows:
+            cur.execute("SAVEPOINT sync_row")
+            try:
+                cur.execute(upsert_sql, row)
+                results.extend(cur.fetchall())
+                cur.execute("RELEASE SAVEPOINT sync_row")
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK TO SAVEPOINT sync_row")
+                errors.append({'name': _record_name(housing), 'error': str(e).strip()})
+        
+        return results, errors
+    
+    def _housing_row(self, housing_data: Dict) -> tuple:
+        """Build an INSERT row in HOUSING_COLUMNS order, filling in defaults"""
+        record = {
+            **housing_data,
+            'amenities': normalize_amenities(housing_data.get('amenities')),
+            # crc32 rather than hash(): str hashes are salted per process, which would
+            # change the defaults (and so rewrite every row) on each refresh
+            'rating': housing_data.get('rating', 4.0 + (_name_hash(housing_data['name']) % 10) / 10),
+            'member_count': housing_data.get('member_count', 20 + (_name_hash(housing_data['name']) % 40)),
+            'image_url': housing_data.get('image_url', self._get_default_image_url(housing_data['housing_type']))
+        }
+        if record.get('latitude') is None or record.get('longitude') is None:
+            record['latitude'], record['longitude'] = geocode(record['name'], record.get('location')) or (None, None)
+        return tuple(record.get(column) for column in HOUSING_COLUMNS)
+    
+    def _build_filters(self, filters: Optional[Dict]) -> tuple:
+        """Translate a filter dict into WHERE clauses and query parameters"""
+        clauses = []
+        params = {}
+        
+        if filters:
+            # Filter by housing type
+            if filters.get('housing_type'):
+                clauses.append("housing_type = %(housing_type)s")
+                params['housing_type'] = filters['housing_type']
+            
+            # Filter by international friendly
+            if 'international_friendly' in filters:
+                clauses.append("is_international_friendly = %(international_friendly)s")
+                params['international_friendly'] = filters['international_friendly']
+            
+            # Filter by price range
+            if filters.get('max_price'):
+                clauses.append("avg_price <= %(max_price)s")
+                params['max_price'] = filters['max_price']
+            
+            if filters.get('min_price'):
+                clauses.append("avg_price >= %(min_price)s")
+                params['min_price'] = filters['min_price']
+            
+            # Filter by ID (for get_housing_by_id)
+            if filters.get('id'):
+                clauses.append("id = %(id)s")
+                params['id'] = filters['id']
+            
+            # Search name, location and description: full-text by default,
+            # substring ILIKE when requested or when the text has no words
+            if filters.get('search'):
+                tsquery = prefix_tsquery(filters['search'])
+                if tsquery and filters.get('search_mode', 'fts') == 'fts':
+                    clauses.append("search_vector @@ to_tsquery('english', %(search_query)s)")
+                    params['search_query'] = tsquery
+                else:
+                    clauses.append("(name ILIKE %(search)s OR location ILIKE %(search)s OR description ILIKE %(search)s)")
+                    params['search'] = f"%{filters['search']}%"
+            
+            # Distance from a point (near=(lat, lon)); radius in miles narrows by
+            # grid cell and bounding box before the exact distance check
+            if filters.get('near'):
+                params['near_lat'], params['near_lon'] = filters['near']
+                if filters.get('radius'):
+                    box, cells = grid_cells(*filters['near'], filters['radius'])
+                    if cells is not None:
+                        clauses.append("grid_cell = ANY(%(grid_cells)s)")
+                        params['grid_cells'] = cells
+                    clauses.append("latitude BETWEEN %(min_lat)s AND %(max_lat)s "
+                                   "AND longitude BETWEEN %(min_lon)s AND %(max_lon)s")
+                    params.update(zip(('min_lat', 'max_lat', 'min_lon', 'max_lon'), box))
+                    clauses.append(f"{ORDER_EXPRESSIONS['distance']} <= %(radius)s")
+                    params['radius'] = filters['radius']
+            elif filters.get('radius') or filters.get('sort') == 'distance':
+                raise ValueError("radius and sort=distance require near")
+            
+            # Filter by amenities: any listed (&&) or all listed (@>), both GIN-indexed
+            if filters.get('amenities'):
+                amenity_list = filters['amenities'] if isinstance(filters['amenities'], list) else [filters['amenities']]
+                operator = '@>' if filters.get('amenity_match') == 'all' else '&&'
+                clauses.append(f"amenities {operator} %(amenities)s::text[]")
+                params['amenities'] = normalize_amenities(amenity_list)
+        
+        return clauses, params
+    
+    def get_housing_by_ids(self, ids: List[int]) -> Dict:
+        """Look up several listings in one query.
+        
+        Returns rows in the order of ids (duplicates collapsed) and the ids
+        that matched no listing.
+        """
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} ids can be looked up at once")
+        return self._cached(cache_key('batch', ids=ids), lambda: self._query_housing_by_ids(ids))
+    
+    def _query_housing_by_ids(self, ids: List[int]) -> Dict:
+        rows = []
+        if ids:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    rows = self._run_query(cur, 'batch', 'ids',
+                                           f"SELECT {SELECT_COLUMNS} FROM housing WHERE id = ANY(%(ids)s)", {'ids': ids})
+        
+        with DB_TRANSFORM_SECONDS.time(operation='batch', shape='ids'):
+            by_id = {row['id']: dict(row) for row in rows}
+            return {
+                'rows': [by_id[housing_id] for housing_id in ids if housing_id in by_id],
+                'missing': [housing_id for housing_id in ids if housing_id not in by_id]
+            }
+    
+    def get_all_housing(self, filters: Optional[Dict] = None) -> List[Dict]:
+        """Get all housing with optional filters"""
+        return self.get_housing_page(filters, limit=None)['rows']
+    
+    def get_housing_page(self, filters: Optional[Dict] = None, limit: Optional[int] = DEFAULT_PAGE_SIZE,
+                         cursor: Optional[str] = None, total: str = 'none') -> Dict:
+        """Get one keyset-paginated page of housing in LIST_ORDER.
+        
+        Full-text searches are ordered by ts_rank first, then LIST_ORDER;
+        filters['sort'] picks one of SORT_ORDERS instead ('distance' orders
+        by distance from near, nearest first). Pass the returned next_cursor
+        back as cursor to fetch the following page. total is 'exact'
+        (COUNT), 'estimate' (planner row estimate) or 'none'. limit=None
+        returns every matching row.
+        """
+        return self._cached(
+            cache_key('page', filters, limit=limit, cursor=cursor, total=total),
+            lambda: self._query_housing_page(filters, limit, cursor, total)
+        )
+    
+    def _query_housing_page(self, filters: Optional[Dict], limit: Optional[int],
+                            cursor: Optional[str], total: str) -> Dict:
+        if self.snapshots is not None:
+            page = self.snapshots.page(self, filters, limit, cursor, total)
+            if page is not None:
+                return page
+        
+        query, params, filter_clauses, order = self._page_query(filters, limit, cursor)
+        shape = filter_shape(filters)
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                # A generic plan would not fold to_tsquery() into a constant, so ts_rank
+                # would re-parse the search for every match; full-text pages stay unprepared
+                fetched = self._run_query(cur, 'page', shape, query, params, prepare='search_query' not in params)
                 
-                cur.execute(base_query, params)
-                results = cur.fetchall()
+                with DB_TRANSFORM_SECONDS.time(operation='page', shape=shape):
+                    rows = [dict(row) for row in fetched]
+                    
+                    next_cursor = None
+                    if limit is not None and len(rows) > limit:
+                        rows = rows[:limit]
+                        next_cursor = encode_cursor([rows[-1][column] for column, _ in order])
                 
-                # Convert to list of dicts
-                return [dict(row) for row in results]
+                count = None
+                if total == 'exact':
+                    count = self._count_housing(cur, filter_clauses, params, shape)
+                elif total == 'estimate':
+                    count = self._estimate_housing_count(cur, filter_clauses, params, shape)
+        
+        return {
+            'rows': rows,
+            'next_cursor': next_cursor,
+            'total': count,
+            'total_is_estimate': total == 'estimate'
+        }
+    
+    def _page_query(self, filters: Optional[Dict], limit: Optional[int], cursor: Optional[str]) -> tuple:
+        """SQL and parameters of a page query, with its filter clauses (for counting) and sort keys"""
+        clauses, params = self._build_filters(filters)
+        filter_clauses = list(clauses)
+        
+        order = list_order(filters)
+        order_sql = " ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in order)
+        limit_sql = " LIMIT %(limit)s" if limit is not None else ""
+        if limit is not None:
+            # Fetch one extra row to learn whether another page exists
+            params['limit'] = limit + 1
+        
+        def select(where: List[str]) -> str:
+            query = self._select_sql(params)
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            return query + order_sql + limit_sql
+        
+        if not cursor:
+            return select(clauses), params, filter_clauses, order
+        
+        values = decode_cursor(cursor, len(order))
+        keyset_sql, keyset_params = _keyset_predicate(order, values)
+        params.update(keyset_params)
+        bound = _keyset_bound(order, values)
+        query = select(clauses + ([bound] if bound else []) + [keyset_sql])
+        
+        name, direction = order[0]
+        if bound and direction == 'ASC' and values[0] is not None:
+            # The bound skips the NULLs sorting last; a second index read
+            # fetches them, and the outer sort only sees two pages of rows
+            tail = select(clauses + [f"{name} IS NULL"])
+            query = f"SELECT * FROM (({query}) UNION ALL ({tail})) AS page" + order_sql + limit_sql
+        return query, params, filter_clauses, order
+    
+    def iter_housing(self, filters: Optional[Dict] = None, fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[Dict]:
+        """Stream every matching row in list order through a server-side cursor.
+        
+        Only fetch_size rows are held in memory at a time. Filters are
+        validated before returning, so bad input raises here rather than
+        mid-stream. The connection is held until the iterator is exhausted
+        or closed. Bypasses the query cache and snapshot. When pooled, raises
+        ExportsBusy if max_exports streams are already open.
+        """
+        clauses, params = self._build_filters(filters)
+        order = list_order(filters)
+        query = self._select_sql(params)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in order)
+        rows = self._stream_rows(query, params, fetch_size, filter_shape(filters))
+        if self._export_slots is None:
+            return rows
+        if not self._export_slots.acquire(blocking=False):
+            raise ExportsBusy(f"{self.max_exports} exports are already running; retry shortly")
+        return _ExportStream(rows, self._export_slots)
+    
+    def _stream_rows(self, query: str, params: Dict, fetch_size: int, shape: str) -> Iterator[Dict]:
+        with self.get_connection() as conn:
+            # A named cursor keeps the result set in Postgres and fetches
+            # fetch_size rows per round trip
+            with conn.cursor(name='housing_export') as cur:
+                cur.itersize = fetch_size
+                with DB_QUERY_SECONDS.time(operation='export', shape=shape):
+                    cur.execute(query, params)
+                for row in cur:
+                    yield row
+    
+    def _select_sql(self, params: Dict) -> str:
+        """SELECT ... FROM housing, with the computed sort keys the filter params need"""
+        query = f"SELECT {SELECT_COLUMNS}"
+        if 'search_query' in params:
+            query += f", {ORDER_EXPRESSIONS['search_rank']} AS search_rank"
+        if 'near_lat' in params:
+            query += f", {ORDER_EXPRESSIONS['distance']} AS distance"
+        return query + " FROM housing"
+    
+    def _count_housing(self, cur, clauses: List[str], params: Dict, shape: str) -> int:
+        query = "SELECT COUNT(*) AS total FROM housing"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return int(self._run_query(cur, 'count', shape, query, params, one=True, prepare=True)['total'])
+    
+    def _estimate_housing_count(self, cur, clauses: List[str], params: Dict, shape: str) -> int:
+        """Planner row estimate for the filtered query, without scanning the table"""
+        query = "EXPLAIN (FORMAT JSON) SELECT 1 FROM housing"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        plan = self._run_query(cur, 'estimate', shape, query, params, one=True)['QUERY PLAN']
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    
+    def get_housing_stats(self, filters: Optional[Dict] = None) -> Dict:
+        """Aggregate listing statistics, computed in the database.
+        
+        Unfiltered stats come from the housing_stats_summary view; filtered
+        stats run STATS_QUERY against the matching rows.
+        """
+        return self._cached(cache_key('stats', filters), lambda: self._query_housing_stats(filters))
+    
+    def _query_housing_stats(self, filters: Optional[Dict]) -> Dict:
+        if self.snapshots is not None:
+            stats = self.snapshots.housing_stats(self, filters)
+            if stats is not None:
+                return stats
+        
+        clauses, params = self._build_filters(filters)
+        
+        shape = filter_shape(filters)
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                if clauses:
+                    row = self._run_query(cur, 'stats', shape, STATS_QUERY + " WHERE " + " AND ".join(clauses),
+                                          params, one=True)
+                else:
+                    row = self._run_query(cur, 'stats_summary', shape, "SELECT * FROM housing_stats_summary", one=True)
+        
+        return {
+            'total_listings': row['total_listings'],
+            'on_campus_count': row['on_campus_count'],
+            'off_campus_count': row['off_campus_count'],
+            'international_friendly_count': row['international_friendly_count'],
+            'price_range': {
+                'min': row['min_price'],
+                'max': row['max_price'],
+                'avg': row['avg_price']
+            }
+        }
+    
+    def get_housing_facets(self, filters: Optional[Dict] = None,
+                           price_buckets: Optional[List[int]] = None) -> Dict:
+        """Counts per housing type, international flag, amenity and price bucket
+        over the listings matching filters, from one grouped query (or the snapshot)"""
+        bounds = validate_price_buckets(price_buckets or DEFAULT_PRICE_BUCKETS)
+        return self._cached(cache_key('facets', filters, price_buckets=bounds),
+                            lambda: self._query_housing_facets(filters, bounds))
+    
+    def _query_housing_facets(self, filters: Optional[Dict], bounds: List[int]) -> Dict:
+        if self.snapshots is not None:
+            facets = self.snapshots.housing_facets(self, filters, bounds)
+            if facets is not None:
+                return facets
+        
+        clauses, params = self._build_filters(filters)
+        params['price_bounds'] = bounds
+        query = FACETS_QUERY.format(where="WHERE " + " AND ".join(clauses) if clauses else "")
+        
+        shape = filter_shape(filters)
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                rows = self._run_query(cur, 'facets', shape, query, params)
+        
+        with DB_TRANSFORM_SECONDS.time(operation='facets', shape=shape):
+            grouped = {'total': {}, 'housing_type': {}, 'international_friendly': {}, 'amenity': {}, 'price': {}}
+            for row in rows:
+                if row['value'] is not None or row['facet'] == 'total':
+                    grouped[row['facet']][row['value']] = int(row['count'])
+            return facet_result(
+                grouped['total'][None],
+                grouped['housing_type'],
+                grouped['international_friendly'],
+                grouped['amenity'],
+                {int(bucket): count for bucket, count in grouped['price'].items()},
+                bounds
+            )
+    
+    def data_version(self) -> int:
+        """Current shared data version, re-read at most every version_check_interval seconds"""
+        return self.data_state()[0]
+    
+    def data_state(self) -> tuple:
+        """(data version, time of the last data change) from housing_data_version"""
+        now = time.monotonic()
+        if self._data_version is None or now - self._version_checked_at >= self.version_check_interval:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    row = self._run_query(cur, 'data_version', 'none',
+                                          "SELECT version, changed_at FROM housing_data_version", one=True)
+            self._data_version = int(row['version']) if row else 0
+            self._data_changed_at = row['changed_at'] if row else None
+            self._version_checked_at = now
+        return self._data_version, self._data_changed_at
+    
+    def _run_query(self, cur, operation: str, shape: str, query: str, params: Optional[Dict] = None,
+                   one: bool = False, prepare: bool = False):
+        """Execute a read and fetch its rows (or one row), timing both and logging slow queries.
+        
+        With prepare, the query runs as a prepared statement when a registry
+        is configured and connections are pooled.
+        """
+        started = time.perf_counter()
+        if prepare and self.statements is not None and self.pool is not None:
+            cur.execute(*self.statements.bind(cur, operation, query, params))
+        else:
+            cur.execute(query, params)
+        executed = time.perf_counter()
+        result = cur.fetchone() if one else cur.fetchall()
+        finished = time.perf_counter()
+        
+        DB_QUERY_SECONDS.observe(executed - started, operation=operation, shape=shape)
+        DB_FETCH_SECONDS.observe(finished - executed, operation=operation, shape=shape)
+        
+        elapsed_ms = (finished - started) * 1000
+        if self.slow_query_ms and elapsed_ms >= self.slow_query_ms:
+            DB_SLOW_QUERIES.inc(operation=operation)
+            print(f"Slow query ({operation}, {shape}): {elapsed_ms:.1f} ms\n"
+                  f"  SQL: {' '.join(query.split())}\n"
+                  f"  params: {params}")
+        return result
+    
+    def snapshot_stats(self) -> Optional[Dict]:
+        """Snapshot serving metrics, or None when serving from Postgres only"""
+        return self.snapshots.stats() if self.snapshots is not None else None
+    
+    def cache_stats(self) -> Optional[Dict]:
+        """Query cache counters, or None when caching is off"""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def prepared_stats(self) -> Optional[Dict]:
+        """Prepared statement counters, or None when statements are not prepared"""
+        return self.statements.stats() if self.statements is not None else None
+    
+    def single_flight_stats(self) -> Optional[Dict]:
+        """Coalescing counters, or None when coalescing is off"""
+        return self.single_flight.stats() if self.single_flight is not None else None
+    
+    def _cached(self, key: str, loader):
+        """Serve a query result from the cache while the data version is unchanged.
+        
+        On a miss, concurrent callers with the same key share one query when
+        single-flight is enabled; only that query's caller fills the cache.
+        """
+        version = None
+        if self.cache is not None:
+            version = self.data_version()
+            found, value = self.cache.get(key, version)
+            if found:
+                return value
+        
+        def load():
+            value = loader()
+            if self.cache is not None:
+                self.cache.set(key, value, version)
+            return value
+        
+        if self.single_flight is None:
+            return load()
+        # The version keeps a query started before a write from answering callers after it
+        return self.single_flight.do(f"{version}:{key}", load)
+    
+    def _mark_data_changed(self, cur):
+        """Refresh derived data and bump the data version, inside the writer's transaction"""
+        cur.execute("REFRESH MATERIALIZED VIEW housing_stats_summary;")
+        # Rows written in this transaction get updated_at = CURRENT_TIMESTAMP, so
+        # changed_at equals max(updated_at) after writes and still advances on deletes
+        cur.execute("UPDATE housing_data_version SET version = version + 1, changed_at = CURRENT_TIMESTAMP;")
+    
+    def _data_change_committed(self):
+        """Make this process pick up its own write on the next read"""
+        self._data_version = None
     
     def clear_housing_data(self):
         """Clear all housing data (for refreshing)"""
         with self.get_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("DELETE FROM housing;")
+                self._mark_data_changed(cur)
                 conn.commit()
-                print("Cleared all housing data")
+        
+        self._data_change_committed()
+        print("Cleared all housing data")
     
     def _get_default_image_url(self, housing_type: str) -> str:
         """Get default image URL based on housing type"""
@@ -175,19 +1093,19 @@ def initialize_database():
     
     scraper = GainesvilleHousingScraper()
     
-    # Clear existing data
-    db.clear_housing_data()
-    
-    # Scrape and insert new data
+    # Scrape and sync existing data
     print("Starting housing data scrape...")
     housing_data = scraper.scrape_all_housing()
     
-    if housing_data:
-        print(f"Inserting {len(housing_data)} housing records...")
-        db.bulk_insert_housing(housing_data)
-        print("Database populated successfully!")
-    else:
-        print("No housing data scraped")
+    # The built-in on-campus listings are always there, so judge the run by the
+    # off-campus sources: if none came through it failed rather than "every listing vanished"
+    if not scraper.synced_sources('off_campus'):
+        print("No off-campus source scraped successfully; keeping the stored listings")
+        return
+    
+    print(f"Syncing {len(housing_data)} housing records...")
+    db.sync_housing(housing_data, sources=scraper.synced_sources())
+    print("Database populated successfully!")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""
+Concurrent page fetcher for the housing scraper.
+
+Pages are fetched on a bounded thread pool. Requests to the same host are
+spaced by a randomized politeness delay, failed attempts are retried with
+exponential backoff, and every fetch is recorded in a per-URL summary.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from metrics import SCRAPE_PHASE_SECONDS
+
+# Responses worth retrying; anything else is returned as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def new_summary(url: str) -> Dict:
+    """Empty per-URL fetch summary"""
+    return {'url': url, 'status': None, 'bytes': 0, 'latency_ms': 0.0, 'attempts': 0, 'error': None,
+            'etag': None, 'last_modified': None}
+
+
+class HostRateLimiter:
+    """Spaces out request starts per host by a random delay in [min_delay, max_delay]"""
+
+    def __init__(self, min_delay: float = 1.0, max_delay: float = 3.0):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._next_allowed: Dict[str, float] = {}
+
+    def wait(self, host: str):
+        """Block until a request to host may start"""
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+
+        with host_lock:
+            delay = self._next_allowed.get(host, 0.0) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_allowed[host] = time.monotonic() + random.uniform(self.min_delay, self.max_delay)
+
+
+class PageFetcher:
+    def __init__(self, max_workers: int = 4, min_delay: float = 1.0, max_delay: float = 3.0,
+                 connect_timeout: float = 5.0, read_timeout: float = 20.0,
+                 retries: int = 2, backoff: float = 0.5, headers: Optional[Dict] = None):
+        self.max_workers = max_workers
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = headers or {}
+        self.rate_limiter = HostRateLimiter(min_delay, max_delay)
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        # requests.Session is not guaranteed thread-safe, so keep one per worker
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def fetch(self, url: str, headers: Optional[Dict] = None) -> Tuple[Optional[str], Dict]:
+        """Fetch one URL, returning (body or None, summary dict).
+
+        headers are extra request headers, e.g. validators for a conditional GET.
+        """
+        host = urlparse(url).netloc
+        summary = new_summary(url)
+        started = time.perf_counter()
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+            self.rate_limiter.wait(host)
+            summary['attempts'] = attempt + 1
+
+            try:
+                response = self._session().get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                summary['error'] = f"{type(e).__name__}: {e}"
+                continue
+
+            summary['status'] = response.status_code
+            summary['bytes'] = len(response.content)
+            if response.status_code in RETRY_STATUSES:
+                summary['error'] = f"HTTP {response.status_code}"
+                continue
+
+            summary['error'] = None if response.ok else f"HTTP {response.status_code}"
+            summary['etag'] = response.headers.get('ETag')
+            summary['last_modified'] = response.headers.get('Last-Modified')
+            self._record_latency(summary, host, started)
+            # 304 Not Modified has no body; the caller reuses its cached copy
+            body = response.text if response.ok and response.status_code != 304 else None
+            return body, summary
+
+        self._record_latency(summary, host, started)
+        return None, summary
+
+    def _record_latency(self, summary: Dict, host: str, started: float):
+        """Total fetch time including retries and politeness delays"""
+        elapsed = time.perf_counter() - started
+        summary['latency_ms'] = elapsed * 1000
+        SCRAPE_PHASE_SECONDS.observe(elapsed, source=host, phase='fetch')
+
+    def fetch_all(self, urls: List[str], request_headers: Optional[Dict[str, Dict]] = None,
+                  on_result: Optional[Callable[[Dict], None]] = None,
+                  cancel_event: Optional[threading.Event] = None) -> List[Tuple[Optional[str], Dict]]:
+        """Fetch URLs concurrently; results are returned in input order.
+
+        request_headers optionally maps a URL to extra headers for its request.
+        on_result is called with each summary as its fetch finishes. Once
+        cancel_event is set, fetches that have not started yet are skipped.
+        """
+        request_headers = request_headers or {}
+
+        def fetch_one(url: str) -> Tuple[Optional[str], Dict]:
+            if cancel_event is not None and cancel_event.is_set():
+                body, summary = None, {**new_summary(url), 'error': "Cancelled"}
+            else:
+                body, summary = self.fetch(url, request_headers.get(url))
+            if on_result is not None:
+                on_result(summary)
+            return body, summary
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch') as executor:
+            return list(executor.map(fetch_one, urls))
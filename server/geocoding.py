@@ -0,0 +1,129 @@
+"""
+Offline geocoder for Gainesville listings.
+
+Locations are resolved against a small bundled gazetteer, with no network
+access:
+  - named places (residence halls, campus landmarks), matched by listing name
+    first and then by location text
+  - Gainesville's quadrant grid: numbered Streets, Terraces, Ways, Drives and
+    Courts run north-south, numbered Avenues, Places, Lanes and Roads run
+    east-west, all counted out from Main Street and University Avenue. A house
+    number's hundreds give the cross street, so 1245 SW 11th Ave lies near
+    SW 12th Street.
+
+Grid positions are interpolated between reference lines read off public
+maps, so results are good to a block or two, which is enough for radius
+search and distance sorting.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Main Street & University Avenue, the origin of the quadrant grid
+GRID_ORIGIN = (29.6516, -82.3248)
+# Century Tower
+CAMPUS_CENTER = (29.6488, -82.3433)
+# Campus center in grid numbers (street, avenue), where a bare line such as
+# "SW 34th Street" is placed
+CAMPUS_GRID = (14, 2)
+
+# (number, degrees of longitude from Main Street) for numbered streets
+STREET_LINES = [(0, 0.0), (6, 0.0070), (13, 0.0135), (34, 0.0470), (43, 0.0684), (75, 0.0977)]
+# (number, degrees of latitude from University Avenue) for numbered avenues
+AVENUE_LINES = [(0, 0.0), (16, 0.0152), (39, 0.0362), (53, 0.0494)]
+
+NORTH_SOUTH_TYPES = {'street', 'st', 'terrace', 'ter', 'way', 'drive', 'dr', 'court', 'ct'}
+EAST_WEST_TYPES = {'avenue', 'ave', 'place', 'pl', 'lane', 'ln', 'road', 'rd'}
+
+# Named grid lines: name -> (north-south?, grid number)
+NAMED_LINES = {
+    'university ave': (False, 0),
+    'university avenue': (False, 0),
+    'main st': (True, 0),
+    'main street': (True, 0),
+}
+
+# Named places, checked as substrings of the lowercased name, then location
+PLACES = {
+    'broward hall': (29.6466, -82.3415),
+    'lakeside complex': (29.6432, -82.3508),
+    'springs complex': (29.6449, -82.3527),
+    'museum road': (29.6455, -82.3462),
+    'century tower': CAMPUS_CENTER,
+    'uf campus': CAMPUS_CENTER,
+}
+
+GRID_ADDRESS_PATTERN = re.compile(
+    r'(?:(\d+)\s+)?(NW|NE|SW|SE)\s+(\d+)(?:st|nd|rd|th)?\s+([a-z]+)\b', re.IGNORECASE
+)
+
+
+def _interpolate(lines: List[Tuple[int, float]], number: float) -> float:
+    """Piecewise-linear offset for a grid number, extrapolating past the last line"""
+    for (low, low_offset), (high, high_offset) in zip(lines, lines[1:]):
+        if number <= high:
+            break
+    return low_offset + (number - low) * (high_offset - low_offset) / (high - low)
+
+
+def grid_point(quadrant: str, street: float, avenue: float) -> Tuple[float, float]:
+    """Coordinates of the intersection of a numbered street and avenue in a quadrant"""
+    quadrant = quadrant.upper()
+    lat_sign = 1 if quadrant[0] == 'N' else -1
+    lon_sign = 1 if quadrant[1] == 'E' else -1
+    return (
+        round(GRID_ORIGIN[0] + lat_sign * _interpolate(AVENUE_LINES, avenue), 6),
+        round(GRID_ORIGIN[1] + lon_sign * _interpolate(STREET_LINES, street), 6),
+    )
+
+
+def _geocode_grid(location: str) -> Optional[Tuple[float, float]]:
+    lines = []
+    for house, quadrant, number, road_type in GRID_ADDRESS_PATTERN.findall(location):
+        road_type = road_type.lower()
+        if road_type in NORTH_SOUTH_TYPES or road_type in EAST_WEST_TYPES:
+            north_south = road_type in NORTH_SOUTH_TYPES
+            if house:
+                cross = int(house) / 100
+            else:
+                cross = CAMPUS_GRID[1] if north_south else CAMPUS_GRID[0]
+            lines.append((quadrant, north_south, int(number), cross))
+
+    lowered = location.lower()
+    named = [(north_south, number) for name, (north_south, number) in NAMED_LINES.items() if name in lowered]
+
+    if not lines:
+        return None
+    quadrant, north_south, number, cross = lines[0]
+
+    # An intersection ("University Ave & SW 13th St") fixes the cross line
+    crossing = [other for _, other_ns, other, _ in lines[1:] if other_ns != north_south]
+    crossing += [other for other_ns, other in named if other_ns != north_south]
+    if crossing:
+        cross = crossing[0]
+
+    if north_south:
+        return grid_point(quadrant, number, cross)
+    return grid_point(quadrant, cross, number)
+
+
+def geocode(name: Optional[str], location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) for a listing, or None if the gazetteer cannot place it"""
+    name_lower = (name or '').lower()
+    for place, point in PLACES.items():
+        if place in name_lower:
+            return point
+
+    if location:
+        point = _geocode_grid(location)
+        if point:
+            return point
+
+        location_lower = location.lower()
+        for place, point in PLACES.items():
+            if place in location_lower:
+                return point
+
+    return None
@@ -3,12 +3,16 @@
 
 import trafilatura
 import requests
-import re
 import json
-from typing import List, Dict, Optional
-from urllib.parse import urljoin, urlparse
+import threading
 import time
-import random
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Optional
+from urllib.parse import urlparse
+from fetcher import PageFetcher, new_summary
+from metrics import SCRAPE_PHASE_SECONDS
+from page_cache import PageCache, content_hash
+from listing_parser import ListingParser
 
 
 def get_website_text_content(url: str) -> str:
@@ -25,8 +29,10 @@ def get_website_text_content(url: str) -> str:
 
 
 class GainesvilleHousingScraper:
-    def __init__(self):
-        self.housing_sources = {
+    def __init__(self, housing_sources: Optional[Dict[str, List[str]]] = None,
+                 fetcher: Optional[PageFetcher] = None, page_cache: Optional[PageCache] = None,
+                 replay: bool = False):
+        self.housing_sources = housing_sources or {
             'off_campus': [
                 'https://alight-gainesville.com/',
                 'https://larkgainesville.com/',
@@ -45,202 +51,164 @@ class GainesvilleHousingScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        
+        # Concurrent fetches with a 1-3s politeness delay between requests to the same host
+        self.fetcher = fetcher or PageFetcher(headers=self.headers)
+        
+        self.parser = ListingParser()
+        
+        # Conditional GETs and parse reuse for unchanged pages; replay=True serves
+        # every source from the cache without touching the network
+        self.page_cache = page_cache if page_cache is not None else PageCache.from_env()
+        self.replay = replay
+        if replay and self.page_cache is None:
+            raise ValueError("Replay mode requires a page cache")
+        
+        # Per-URL fetch summary of the last scrape_all_housing run
+        self.last_run_summary: List[Dict] = []
 
     def extract_housing_info(self, url: str, housing_type: str) -> List[Dict]:
         """Extract housing information from a given URL"""
         try:
             print(f"Scraping {url}...")
             
-            # Get website content
-            content = get_website_text_content(url)
-            if not content:
-                print(f"No content found for {url}")
-                return []
-            
-            # Parse content to extract housing information
-            housing_data = self._parse_housing_content(content, url, housing_type)
-            
-            # Add small delay to be respectful
-            time.sleep(random.uniform(1, 3))
-            
-            return housing_data
+            html, summary = self._fetch_sources([url])[0]
+            if summary['error']:
+                print(f"Error fetching {url}: {summary['error']}")
+            return self._listings_for_page(url, html, summary, housing_type)
             
         except Exception as e:
             print(f"Error scraping {url}: {str(e)}")
             return []
 
-    def _parse_housing_content(self, content: str, source_url: str, housing_type: str) -> List[Dict]:
-        """Parse extracted content to find housing information"""
-        housing_listings = []
-        
-        # Extract basic information from content
-        # This is a simplified parser - in reality, you'd need more sophisticated parsing
-        
-        # Look for common patterns in housing websites
-        price_patterns = [
-            r'\$(\d+)(?:,\d+)?(?:\.\d+)?(?:/month|/mo|per month)',
-            r'\$(\d+)(?:,\d+)?(?:\.\d+)?'
-        ]
+    def _fetch_sources(self, urls: List[str], on_result: Optional[Callable[[Dict], None]] = None,
+                       cancel_event: Optional[threading.Event] = None) -> List:
+        """Fetch sources concurrently, conditionally when cached, or replay them from the cache"""
+        if self.replay:
+            results = []
+            for url in urls:
+                cached = self.page_cache.get(url) is not None
+                summary = {**new_summary(url), 'status': 304 if cached else None,
+                           'error': None if cached else "Not in cache"}
+                if on_result is not None:
+                    on_result(summary)
+                results.append((None, summary))
+            return results
         
-        # Extract prices
-        prices = []
-        for pattern in price_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            prices.extend([int(match.replace(',', '')) for match in matches if match.isdigit()])
-        
-        # Determine housing characteristics based on URL and content
-        name = self._extract_property_name(source_url, content)
-        location = self._extract_location(content)
-        amenities = self._extract_amenities(content)
-        
-        # Determine if international student friendly
-        is_international_friendly = self._is_international_friendly(content)
-        
-        # Create housing listing
-        if name and prices:
-            avg_price = sum(prices[:3]) // len(prices[:3]) if prices else 750  # Use average of first few prices found
-            
-            housing_info = {
-                'name': name,
-                'location': location or 'Gainesville, FL',
-                'price_range': f"${min(prices)}-${max(prices)}" if len(prices) > 1 else f"${avg_price}",
-                'avg_price': avg_price,
-                'housing_type': housing_type,
-                'is_international_friendly': is_international_friendly,
-                'amenities': amenities,
-                'source_url': source_url,
-                'distance_to_campus': self._estimate_distance(location or ''),
-                'bus_routes': self._extract_bus_routes(content),
-                'description': self._extract_description(content)
-            }
-            
-            housing_listings.append(housing_info)
-        
-        return housing_listings
+        request_headers = {}
+        if self.page_cache is not None:
+            request_headers = {url: self.page_cache.conditional_headers(url) for url in urls}
+        return self.fetcher.fetch_all(urls, request_headers, on_result=on_result, cancel_event=cancel_event)
 
-    def _extract_property_name(self, url: str, content: str) -> str:
-        """Extract property name from URL or content"""
-        # Try to get name from URL first
-        domain = urlparse(url).netloc
-        if 'alight' in domain:
-            return 'Alight Gainesville'
-        elif 'lark' in domain:
-            return 'Lark Gainesville' 
-        elif 'standard' in domain:
-            return 'The Standard at Gainesville'
-        elif 'huboncampus' in domain:
-            return 'Hub On Campus Gainesville'
-        elif 'redpoint' in domain:
-            return 'Redpoint Gainesville'
-        elif 'retreat' in domain:
-            return 'The Retreat at Gainesville'
-        
-        # Try to extract from content
-        name_patterns = [
-            r'(?:Welcome to|About) ([A-Z][A-Za-z\s&]+(?:Gainesville|Apartments|Village|Commons))',
-            r'([A-Z][A-Za-z\s&]+(?:Gainesville|Apartments|Village|Commons))'
-        ]
+    def _listings_for_page(self, url: str, html: Optional[str], summary: Dict, housing_type: str) -> List[Dict]:
+        """Turn a fetch result into listings, reusing the cached parse of unchanged pages"""
+        cache = self.page_cache
+        if cache is None:
+            return self._extract_from_html(html, url, housing_type, summary)
         
-        for pattern in name_patterns:
-            match = re.search(pattern, content)
-            if match:
-                return match.group(1).strip()
-        
-        return "Student Housing"
-
-    def _extract_location(self, content: str) -> Optional[str]:
-        """Extract location information"""
-        location_patterns = [
-            r'(\d+\s+(?:SW|NW|SE|NE|North|South|East|West)\s+[A-Za-z\s]+(?:Street|Ave|Avenue|Place|Road|Dr|Drive))',
-            r'((?:SW|NW|SE|NE)\s+\d+\w*\s+(?:Street|Ave|Avenue|Place|Road))'
-        ]
+        if html is None:
+            # 304, replay or failed fetch: fall back to the last good parse
+            listings = cache.cached_listings(url, housing_type)
+            if listings is not None:
+                summary['cache'] = 'not_modified' if summary['status'] == 304 else 'stale'
+                return listings
+            html = cache.read_body(url)
+        elif not cache.store_page(url, html, summary.get('etag'), summary.get('last_modified')):
+            listings = cache.cached_listings(url, housing_type)
+            if listings is not None:
+                summary['cache'] = 'unchanged'
+                return listings
         
-        for pattern in location_patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
-            if match:
-                return match.group(1)
+        content = self._extract_text(html, url, summary)
+        if not content:
+            print(f"No content found for {url}")
+            return []
         
-        return None
+        text_hash = content_hash(content)
+        listings = cache.parsed_listings(url, text_hash, housing_type)
+        if listings is None:
+            with self._phase_timer(url, summary, 'parse'):
+                listings = self._parse_housing_content(content, url, housing_type)
+            summary['cache'] = 'parsed'
+        else:
+            summary['cache'] = 'text_unchanged'
+        cache.store_listings(url, text_hash, housing_type, listings)
+        return listings
 
-    def _extract_amenities(self, content: str) -> List[str]:
-        """Extract amenities from content"""
-        amenity_keywords = [
-            'pool', 'gym', 'fitness', 'parking', 'furnished', 'laundry',
-            'wifi', 'internet', 'study', 'lounge', 'tennis', 'basketball',
-            'volleyball', 'pet-friendly', 'shuttle', 'bus'
-        ]
-        
-        found_amenities = []
-        content_lower = content.lower()
-        
-        for amenity in amenity_keywords:
-            if amenity in content_lower:
-                found_amenities.append(amenity.title())
+    def _extract_from_html(self, html: Optional[str], url: str, housing_type: str,
+                           summary: Optional[Dict] = None) -> List[Dict]:
+        """Extract main text from a fetched page and parse it into listings"""
+        content = self._extract_text(html, url, summary)
+        if not content:
+            print(f"No content found for {url}")
+            return []
         
-        return found_amenities[:8]  # Limit to 8 amenities
+        with self._phase_timer(url, summary, 'parse'):
+            return self._parse_housing_content(content, url, housing_type)
 
-    def _is_international_friendly(self, content: str) -> bool:
-        """Determine if housing is international student friendly"""
-        international_keywords = [
-            'international', 'global', 'furnished', 'short-term',
-            'all-inclusive', 'utilities included', 'no guarantor',
-            'visa', 'f-1', 'student visa'
-        ]
-        
-        content_lower = content.lower()
-        return any(keyword in content_lower for keyword in international_keywords)
+    def _extract_text(self, html: Optional[str], url: str, summary: Optional[Dict]) -> Optional[str]:
+        if not html:
+            return None
+        with self._phase_timer(url, summary, 'extract'):
+            return trafilatura.extract(html)
 
-    def _estimate_distance(self, location: str) -> str:
-        """Estimate distance to campus based on location"""
-        if not location:
-            return "2.5 miles from campus"
-        
-        # Simple heuristic based on street names
-        if any(area in location.lower() for area in ['13th', 'university', 'campus']):
-            return "0.5-1.5 miles from campus"
-        elif any(area in location.lower() for area in ['20th', '34th', '35th']):
-            return "1.5-3 miles from campus"
-        else:
-            return "2-4 miles from campus"
+    @contextmanager
+    def _phase_timer(self, url: str, summary: Optional[Dict], phase: str):
+        """Time an extract or parse step into the source's summary and metrics"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            SCRAPE_PHASE_SECONDS.observe(elapsed, source=urlparse(url).netloc, phase=phase)
+            if summary is not None:
+                summary[f'{phase}_ms'] = elapsed * 1000
 
-    def _extract_bus_routes(self, content: str) -> List[str]:
-        """Extract bus route information"""
-        # Look for RTS route information
-        route_patterns = [
-            r'route\s+(\d+)',
-            r'rts\s+(\d+)',
-            r'bus\s+(\d+)'
-        ]
-        
-        routes = []
-        for pattern in route_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            routes.extend(matches)
-        
-        return list(set(routes))  # Remove duplicates
+    def _parse_housing_content(self, content: str, source_url: str, housing_type: str) -> List[Dict]:
+        """Parse extracted content to find housing information"""
+        return self.parser.parse(content, source_url, housing_type)
 
-    def _extract_description(self, content: str) -> str:
-        """Extract or generate description"""
-        # Try to find description-like content
-        sentences = content.split('.')[:5]  # First 5 sentences
-        description = '. '.join(sentences).strip()
-        
-        # Limit length
-        if len(description) > 200:
-            description = description[:197] + "..."
+    def scrape_all_housing(self, progress: Optional[Callable[[str, Dict], None]] = None,
+                           cancel_event: Optional[threading.Event] = None) -> List[Dict]:
+        """Scrape all housing sources and return combined data.
         
-        return description or "Student housing in Gainesville near University of Florida."
-
-    def scrape_all_housing(self) -> List[Dict]:
-        """Scrape all housing sources and return combined data"""
+        progress, if given, is called as progress('fetched' | 'parsed', summary)
+        for each source. Setting cancel_event stops the run early; the caller
+        should check it and discard the partial result.
+        """
         all_housing = []
+        self.last_run_summary = []
         
         print("Starting to scrape Gainesville housing data...")
         
-        # Scrape off-campus housing
-        for url in self.housing_sources['off_campus']:
-            housing_data = self.extract_housing_info(url, 'off_campus')
+        # Fetch off-campus sources concurrently, then extract and parse each page
+        urls = self.housing_sources['off_campus']
+        on_fetched = (lambda summary: progress('fetched', summary)) if progress else None
+        for url, (html, summary) in zip(urls, self._fetch_sources(urls, on_fetched, cancel_event)):
+            if cancel_event is not None and cancel_event.is_set():
+                summary['error'] = summary['error'] or "Cancelled"
+                summary['listings'] = 0
+                self.last_run_summary.append(summary)
+                continue
+            
+            try:
+                housing_data = self._listings_for_page(url, html, summary, 'off_campus')
+            except Exception as e:
+                print(f"Error parsing {url}: {str(e)}")
+                summary['error'] = summary['error'] or f"Parse error: {e}"
+                housing_data = []
+            
+            summary['listings'] = len(housing_data)
+            self.last_run_summary.append(summary)
             all_housing.extend(housing_data)
+            if progress:
+                progress('parsed', summary)
+        
+        for summary in self.last_run_summary:
+            print(f"  {summary['url']}: status={summary['status']} bytes={summary['bytes']} "
+                  f"latency={summary['latency_ms']:.0f}ms extract={summary.get('extract_ms', 0):.0f}ms "
+                  f"parse={summary.get('parse_ms', 0):.0f}ms attempts={summary['attempts']} "
+                  f"listings={summary['listings']} cache={summary.get('cache', '-')}" + (f" error={summary['error']}" if summary['error'] else ""))
         
         # Add some known on-campus options
         all_housing.extend(self._get_on_campus_housing())
@@ -248,6 +216,17 @@ class GainesvilleHousingScraper:
         print(f"Scraped {len(all_housing)} housing listings")
         return all_housing
 
+    def synced_sources(self, housing_type: Optional[str] = None) -> List[str]:
+        """Source URLs the last scrape_all_housing run fully reflects: off-campus
+        sources fetched and parsed without error, plus the built-in on-campus
+        listings' sources. sync_housing only deletes stored rows from these."""
+        sources = []
+        if housing_type in (None, 'off_campus'):
+            sources += [summary['url'] for summary in self.last_run_summary if not summary['error']]
+        if housing_type in (None, 'on_campus'):
+            sources += sorted({housing['source_url'] for housing in self._get_on_campus_housing()})
+        return sources
+
     def _get_on_campus_housing(self) -> List[Dict]:
         """Add known on-campus housing options"""
         on_campus_options = [
@@ -0,0 +1,75 @@
+"""
+Conditional GET support for the housing endpoints.
+
+ETags are derived from the shared data version plus the request path and
+query string, so a client can be answered with 304 Not Modified from the
+version row alone, before any listing query runs or any body is serialized.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+# Cache-Control per endpoint, overridable with CACHE_CONTROL_<ENDPOINT>
+DEFAULT_CACHE_CONTROL = {
+    'housing_list': 'public, max-age=60',
+    'housing_item': 'public, max-age=300',
+    'housing_batch': 'public, max-age=300',
+    'housing_stats': 'public, max-age=300',
+    'housing_facets': 'public, max-age=60',
+}
+
+
+def cache_control_for(endpoint: str) -> str:
+    return os.getenv(f"CACHE_CONTROL_{endpoint.upper()}", DEFAULT_CACHE_CONTROL.get(endpoint, 'no-cache'))
+
+
+def make_etag(version: int, request: Request) -> str:
+    """Strong ETag for this data version, path and (order-independent) query string"""
+    query = '&'.join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{version}:{request.url.path}?{query}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return any(candidate == '*' or candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(request: Request, endpoint: str, version: int,
+                         last_modified: Optional[datetime]) -> Tuple[Optional[Response], Dict[str, str]]:
+    """Return (304 response or None, validator headers to attach to a full response)"""
+    etag = make_etag(version, request)
+    headers = {'ETag': etag, 'Cache-Control': cache_control_for(endpoint)}
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers['Last-Modified'] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get('if-modified-since')
+        not_modified = bool(if_modified_since and last_modified is not None
+                            and _not_modified_since(if_modified_since, last_modified))
+
+    if not_modified:
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
@@ -0,0 +1,176 @@
+"""
+Listing parser for scraped housing pages.
+
+All patterns are compiled once at import time and the page text is lowercased
+once per parse. Amenity and international-friendliness keywords are matched
+together against that lowercased text, and patterns whose result does not
+depend on case run case-sensitively on it, which lets the regex engine use
+its literal-prefix fast path instead of IGNORECASE matching.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+AMENITY_KEYWORDS = [
+    'pool', 'gym', 'fitness', 'parking', 'furnished', 'laundry',
+    'wifi', 'internet', 'study', 'lounge', 'tennis', 'basketball',
+    'volleyball', 'pet-friendly', 'shuttle', 'bus'
+]
+MAX_AMENITIES = 8
+
+INTERNATIONAL_KEYWORDS = [
+    'international', 'global', 'furnished', 'short-term',
+    'all-inclusive', 'utilities included', 'no guarantor',
+    'visa', 'f-1', 'student visa'
+]
+
+# Known properties, matched against the source domain
+DOMAIN_NAMES = [
+    ('alight', 'Alight Gainesville'),
+    ('lark', 'Lark Gainesville'),
+    ('standard', 'The Standard at Gainesville'),
+    ('huboncampus', 'Hub On Campus Gainesville'),
+    ('redpoint', 'Redpoint Gainesville'),
+    ('retreat', 'The Retreat at Gainesville'),
+]
+
+# One scan finds every dollar amount; group 2 is set when a per-month suffix follows
+PRICE_PATTERN = re.compile(r'\$(\d+)(?:,\d+)?(?:\.\d+)?(/month|/mo|per month)?', re.IGNORECASE)
+
+NAME_PATTERNS = [
+    re.compile(r'(?:Welcome to|About) ([A-Z][A-Za-z\s&]+(?:Gainesville|Apartments|Village|Commons))'),
+    re.compile(r'([A-Z][A-Za-z\s&]+(?:Gainesville|Apartments|Village|Commons))'),
+]
+
+LOCATION_PATTERNS = [
+    re.compile(r'(\d+\s+(?:SW|NW|SE|NE|North|South|East|West)\s+[A-Za-z\s]+(?:Street|Ave|Avenue|Place|Road|Dr|Drive))', re.IGNORECASE),
+    re.compile(r'((?:SW|NW|SE|NE)\s+\d+\w*\s+(?:Street|Ave|Avenue|Place|Road))', re.IGNORECASE),
+]
+
+# Applied to lowercased text
+BUS_ROUTE_PATTERN = re.compile(r'(?:r(?:oute|ts)|bus)\s+(\d+)')
+
+NEAR_CAMPUS_AREAS = ['13th', 'university', 'campus']
+MID_DISTANCE_AREAS = ['20th', '34th', '35th']
+
+
+class KeywordMatcher:
+    """Finds which of a fixed set of keywords occur in a lowercased text.
+
+    Keywords shared between lists are searched once. Each lookup is a plain
+    substring search: CPython's str search skips through the text far faster
+    than a combined regex alternation, which has to attempt every alternative
+    at every position (about 10x slower on the fixture pages, see
+    benchmarks/parser_benchmark.py).
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keywords))
+
+    def find(self, text: str) -> Set[str]:
+        return {keyword for keyword in self.keywords if keyword in text}
+
+
+class ListingParser:
+    def __init__(self):
+        self.keyword_matcher = KeywordMatcher(AMENITY_KEYWORDS + INTERNATIONAL_KEYWORDS)
+
+    def parse(self, content: str, source_url: str, housing_type: str) -> List[Dict]:
+        """Parse extracted page text into housing listings"""
+        housing_listings = []
+
+        content_lower = content.lower()
+        prices = self.extract_prices(content)
+        name = self.extract_property_name(source_url, content)
+        location = self.extract_location(content)
+
+        keywords = self.keyword_matcher.find(content_lower)
+        amenities = [keyword.title() for keyword in AMENITY_KEYWORDS if keyword in keywords][:MAX_AMENITIES]
+        is_international_friendly = any(keyword in keywords for keyword in INTERNATIONAL_KEYWORDS)
+
+        if name and prices:
+            avg_price = sum(prices[:3]) // len(prices[:3]) if prices else 750  # Use average of first few prices found
+
+            housing_listings.append({
+                'name': name,
+                'location': location or 'Gainesville, FL',
+                'price_range': f"${min(prices)}-${max(prices)}" if len(prices) > 1 else f"${avg_price}",
+                'avg_price': avg_price,
+                'housing_type': housing_type,
+                'is_international_friendly': is_international_friendly,
+                'amenities': amenities,
+                'source_url': source_url,
+                'distance_to_campus': self.estimate_distance(location or ''),
+                'bus_routes': self.extract_bus_routes(content_lower),
+                'description': self.extract_description(content)
+            })
+
+        return housing_listings
+
+    def extract_prices(self, content: str) -> List[int]:
+        """Per-month prices first, then every dollar amount, in page order"""
+        monthly, every = [], []
+        for match in PRICE_PATTERN.finditer(content):
+            price = int(match.group(1))
+            every.append(price)
+            if match.group(2):
+                monthly.append(price)
+        return monthly + every
+
+    def extract_property_name(self, url: str, content: str) -> str:
+        """Extract property name from URL or content"""
+        domain = urlparse(url).netloc
+        for marker, name in DOMAIN_NAMES:
+            if marker in domain:
+                return name
+
+        for pattern in NAME_PATTERNS:
+            match = pattern.search(content)
+            if match:
+                return match.group(1).strip()
+
+        return "Student Housing"
+
+    def extract_location(self, content: str) -> Optional[str]:
+        """Extract location information"""
+        for pattern in LOCATION_PATTERNS:
+            match = pattern.search(content)
+            if match:
+                return match.group(1)
+        return None
+
+    def extract_amenities(self, content: str) -> List[str]:
+        keywords = self.keyword_matcher.find(content.lower())
+        return [keyword.title() for keyword in AMENITY_KEYWORDS if keyword in keywords][:MAX_AMENITIES]
+
+    def is_international_friendly(self, content: str) -> bool:
+        keywords = self.keyword_matcher.find(content.lower())
+        return any(keyword in keywords for keyword in INTERNATIONAL_KEYWORDS)
+
+    def estimate_distance(self, location: str) -> str:
+        """Estimate distance to campus based on location"""
+        if not location:
+            return "2.5 miles from campus"
+
+        location_lower = location.lower()
+        if any(area in location_lower for area in NEAR_CAMPUS_AREAS):
+            return "0.5-1.5 miles from campus"
+        elif any(area in location_lower for area in MID_DISTANCE_AREAS):
+            return "1.5-3 miles from campus"
+        else:
+            return "2-4 miles from campus"
+
+    def extract_bus_routes(self, content_lower: str) -> List[str]:
+        """Unique RTS route numbers in page order, from lowercased text"""
+        return list(dict.fromkeys(BUS_ROUTE_PATTERN.findall(content_lower)))
+
+    def extract_description(self, content: str) -> str:
+        """Extract or generate description"""
+        sentences = content.split('.', 5)[:5]  # First 5 sentences
+        description = '. '.join(sentences).strip()
+
+        if len(description) > 200:
+            description = description[:197] + "..."
+
+        return description or "Student housing in Gainesville near University of Florida."
@@ -0,0 +1,184 @@
+"""
+In-process Prometheus metrics for the housing API and scraper.
+
+Counters, gauges and histograms live in this module's registry and are
+rendered in the Prometheus text exposition format (version 0.0.4) by
+render(), which the API serves on /metrics. No client library is needed.
+Each uvicorn worker keeps its own values, so with several workers every
+scrape sees one worker; run one worker per scrape target or aggregate in
+Prometheus.
+
+Labels are passed as keyword arguments and must stay low-cardinality:
+route templates rather than paths, filter names rather than values.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; suits both sub-millisecond queries and multi-second page fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: List['_Metric'] = []
+# Callables yielding (name, type, help, value) for values kept elsewhere,
+# such as connection pool and query cache counters
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, float]]]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(suffix, formatted labels, value) for every labelled series"""
+        with self._lock:
+            return [('', _format_labels(self.labelnames, key), value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the seconds spent inside the block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+
+        samples = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', _format_labels(self.labelnames + ('le',), key + (_format_value(bound),)),
+                                cumulative))
+            samples.append(('_bucket', _format_labels(self.labelnames + ('le',), key + ('+Inf',)), count))
+            samples.append(('_sum', _format_labels(self.labelnames, key), total))
+            samples.append(('_count', _format_labels(self.labelnames, key), count))
+        return samples
+
+
+def register_collector(collector: Callable[[], Iterable[Tuple[str, str, str, float]]]):
+    """Add a callable yielding (name, type, help, value) samples at render time"""
+    _collectors.append(collector)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, kind, help, value in collector():
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"])
+    return '\n'.join(lines) + '\n'
+
+
+# HTTP (recorded by the API middleware)
+HTTP_REQUESTS = Counter('housing_http_requests_total', 'HTTP requests by method, route template and status',
+                        ['method', 'route', 'status'])
+HTTP_REQUEST_SECONDS = Histogram('housing_http_request_duration_seconds', 'HTTP request latency by method and route',
+                                 ['method', 'route'])
+HTTP_REQUESTS_IN_FLIGHT = Gauge('housing_http_requests_in_flight', 'HTTP requests currently being served')
+
+# Database (recorded by HousingDatabase); shape is the sorted filter names
+DB_CONNECTION_ACQUIRE_SECONDS = Histogram('housing_db_connection_acquire_seconds',
+                                          'Time to get a database connection, including pool waits')
+DB_QUERY_SECONDS = Histogram('housing_db_query_seconds', 'Query execution time by operation and filter shape',
+                             ['operation', 'shape'])
+DB_FETCH_SECONDS = Histogram('housing_db_fetch_seconds', 'Row fetch time by operation and filter shape',
+                             ['operation', 'shape'])
+DB_TRANSFORM_SECONDS = Histogram('housing_db_transform_seconds',
+                                 'Python time turning fetched rows into results, by operation and filter shape',
+                                 ['operation', 'shape'])
+DB_SLOW_QUERIES = Counter('housing_db_slow_queries_total', 'Queries slower than HOUSING_SLOW_QUERY_MS', ['operation'])
+
+# Scraper (recorded per source host and phase: fetch, extract, parse)
+SCRAPE_PHASE_SECONDS = Histogram('housing_scrape_phase_seconds', 'Scraper time per source and phase',
+                                 ['source', 'phase'])
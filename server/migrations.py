@@ -0,0 +1,214 @@
+"""
+Versioned schema migrations for the housing database.
+
+Applied versions are recorded in schema_migrations. On startup a single
+SELECT compares the recorded version with the latest one here; only when
+migrations are pending does the runner take an advisory lock (so concurrent
+workers migrate once) and run DDL. Migrations are history: never edit one
+that has shipped, append a new one instead.
+
+Databases created before this module by the old init_tables() have no
+schema_migrations table. Every migration up to 6 is idempotent, so they are
+simply replayed and recorded.
+"""
+
+from typing import List
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from amenities import AMENITY_ALIASES, CANONICAL_KEY, normalize_amenities
+from geocoding import geocode
+
+# pg advisory lock key serializing migration runs across processes
+MIGRATION_LOCK_KEY = 0x4D696772  # 'Migr'
+
+
+def _normalize_stored_amenities(cur):
+    """Rewrite amenity labels that are not canonical keys"""
+    cur.execute("""
+        SELECT id, amenities FROM housing
+        WHERE EXISTS (
+            SELECT 1 FROM unnest(amenities) AS amenity
+            WHERE amenity !~ %(pattern)s OR amenity = ANY(%(aliases)s)
+        )
+    """, {'pattern': CANONICAL_KEY.pattern, 'aliases': list(AMENITY_ALIASES)})
+    updates = [(normalize_amenities(row['amenities']), row['id']) for row in cur.fetchall()]
+
+    if updates:
+        execute_values(
+            cur,
+            "UPDATE housing SET amenities = data.amenities FROM (VALUES %s) AS data (amenities, id) "
+            "WHERE housing.id = data.id",
+            updates,
+            template="(%s::text[], %s)"
+        )
+        print(f"Normalized amenities on {len(updates)} housing records")
+
+
+def _add_amenity_index(cur):
+    # Amenities are stored as canonical keys; normalize rows written before that
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_housing_amenities ON housing USING GIN (amenities);")
+    _normalize_stored_amenities(cur)
+
+
+def _add_coordinates(cur):
+    # grid_cell buckets coordinates into 0.01 degree cells (about 0.7 x 0.6 miles
+    # here); radius queries probe the btree index with the cells their bounding
+    # box covers. PostGIS is not assumed to be installed.
+    cur.execute("""
+        ALTER TABLE housing
+            ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+        ALTER TABLE housing ADD COLUMN IF NOT EXISTS grid_cell INTEGER
+            GENERATED ALWAYS AS (FLOOR(latitude * 100)::INTEGER * 100000 + FLOOR(longitude * 100)::INTEGER) STORED;
+        CREATE INDEX IF NOT EXISTS idx_housing_grid_cell ON housing (grid_cell);
+    """)
+
+    cur.execute("SELECT id, name, location FROM housing WHERE latitude IS NULL;")
+    updates = [(row['id'], *point) for row in cur.fetchall() if (point := geocode(row['name'], row['location']))]
+    if updates:
+        execute_values(
+            cur,
+            "UPDATE housing SET latitude = data.latitude, longitude = data.longitude "
+            "FROM (VALUES %s) AS data (id, latitude, longitude) WHERE housing.id = data.id",
+            updates
+        )
+        print(f"Geocoded {len(updates)} housing records")
+
+
+# (version, name, SQL or callable(cursor)), in order
+MIGRATIONS = [
+    (1, 'create_housing', """
+        CREATE TABLE IF NOT EXISTS housing (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            location VARCHAR(255),
+            price_range VARCHAR(100),
+            avg_price INTEGER,
+            housing_type VARCHAR(50) NOT NULL,
+            is_international_friendly BOOLEAN DEFAULT FALSE,
+            amenities TEXT[], -- PostgreSQL array type
+            source_url VARCHAR(500),
+            distance_to_campus VARCHAR(100),
+            bus_routes TEXT[],
+            description TEXT,
+            rating FLOAT DEFAULT 4.0,
+            member_count INTEGER DEFAULT 0,
+            image_url VARCHAR(500),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_housing_type ON housing(housing_type);
+        CREATE INDEX IF NOT EXISTS idx_housing_international ON housing(is_international_friendly);
+        CREATE INDEX IF NOT EXISTS idx_housing_price ON housing(avg_price);
+        CREATE INDEX IF NOT EXISTS idx_housing_list_order ON housing(rating DESC, avg_price ASC, id ASC);
+    """),
+    # Weighted full-text document (name > location > description), maintained
+    # by Postgres on every insert/update
+    (2, 'add_search_vector', """
+        ALTER TABLE housing ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            ) STORED;
+        CREATE INDEX IF NOT EXISTS idx_housing_search ON housing USING GIN (search_vector);
+    """),
+    (3, 'add_amenity_index', _add_amenity_index),
+    # Shared data version, bumped by every write; lets each worker's query
+    # cache detect changes made by any process
+    (4, 'create_data_version', """
+        CREATE TABLE IF NOT EXISTS housing_data_version (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            version BIGINT NOT NULL DEFAULT 0
+        );
+        INSERT INTO housing_data_version (id, version) VALUES (TRUE, 0) ON CONFLICT (id) DO NOTHING;
+        ALTER TABLE housing_data_version
+            ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP;
+    """),
+    # One-row summary for unfiltered /api/housing/stats, refreshed on every write
+    (5, 'create_stats_summary', """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS housing_stats_summary AS
+        SELECT
+            COUNT(*) AS total_listings,
+            COUNT(*) FILTER (WHERE housing_type = 'on_campus') AS on_campus_count,
+            COUNT(*) FILTER (WHERE housing_type = 'off_campus') AS off_campus_count,
+            COUNT(*) FILTER (WHERE is_international_friendly) AS international_friendly_count,
+            COALESCE(MIN(avg_price), 0) AS min_price,
+            COALESCE(MAX(avg_price), 0) AS max_price,
+            COALESCE(FLOOR(AVG(avg_price)), 0)::INTEGER AS avg_price
+        FROM housing;
+    """),
+    # Natural key for incremental refreshes; drop duplicates left by earlier
+    # full reloads (keeping the oldest row) so the index can build
+    (6, 'add_natural_key', """
+        DELETE FROM housing a USING housing b
+        WHERE COALESCE(a.source_url, '') = COALESCE(b.source_url, '')
+          AND a.name = b.name AND a.id > b.id;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_housing_natural_key ON housing ((COALESCE(source_url, '')), name);
+    """),
+    (7, 'add_coordinates', _add_coordinates),
+    # Indexes in the order of each sort= option, alone and behind housing_type,
+    # so sorted pages are read in index order. The single-column type and price
+    # indexes are prefixes of these and would only add write cost.
+    (8, 'add_sort_indexes', """
+        CREATE INDEX IF NOT EXISTS idx_housing_type_list_order ON housing(housing_type, rating DESC, avg_price ASC, id ASC);
+        CREATE INDEX IF NOT EXISTS idx_housing_price_order ON housing(avg_price, id);
+        CREATE INDEX IF NOT EXISTS idx_housing_type_price_order ON housing(housing_type, avg_price, id);
+        CREATE INDEX IF NOT EXISTS idx_housing_members_order ON housing(member_count DESC, id);
+        CREATE INDEX IF NOT EXISTS idx_housing_type_members_order ON housing(housing_type, member_count DESC, id);
+        CREATE INDEX IF NOT EXISTS idx_housing_newest ON housing(created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS idx_housing_type_newest ON housing(housing_type, created_at DESC, id DESC);
+        DROP INDEX IF EXISTS idx_housing_type;
+        DROP INDEX IF EXISTS idx_housing_price;
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn) -> int:
+    """Highest applied migration, or 0 for a database without schema_migrations"""
+    with conn.cursor() as cur:
+        try:
+            cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations;")
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback()
+            return 0
+        return cur.fetchone()['version']
+
+
+def migrate(conn) -> List[int]:
+    """Apply pending migrations in one transaction; returns the versions applied"""
+    if schema_version(conn) >= LATEST_VERSION:
+        conn.rollback()
+        return []
+
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_KEY,))
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        # Another worker may have migrated while we waited for the lock
+        cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations;")
+        current = cur.fetchone()['version']
+
+        for version, name, step in MIGRATIONS:
+            if version <= current:
+                continue
+            if callable(step):
+                step(cur)
+            else:
+                cur.execute(step)
+            cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s);", (version, name))
+            print(f"Applied migration {version}: {name}")
+            applied.append(version)
+
+    conn.commit()
+    return applied
@@ -0,0 +1,157 @@
+"""
+On-disk HTTP page cache for the housing scraper.
+
+For each source URL the cache keeps the last response body, its ETag and
+Last-Modified validators (for conditional GETs), hashes of the raw page and
+of the extracted text, and the listings parsed from it. A page that comes
+back 304, byte-identical, or with unchanged extracted text can reuse the
+previous parse. Bodies are evicted least-recently-used once the cache grows
+past max_bytes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.scraper_cache')
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index: Dict[str, Dict] = self._load_index()
+
+    @classmethod
+    def from_env(cls) -> Optional['PageCache']:
+        """Cache configured from SCRAPER_CACHE_DIR / SCRAPER_CACHE_MAX_BYTES; an empty dir disables it"""
+        directory = os.getenv('SCRAPER_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if not directory:
+            return None
+        return cls(directory, int(os.getenv('SCRAPER_CACHE_MAX_BYTES', 50 * 1024 * 1024)))
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self._index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html')
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._index.get(url)
+            return dict(entry) if entry else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a cached URL"""
+        entry = self.get(url)
+        headers = {}
+        if entry and os.path.exists(self._body_path(url)):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_body(self, url: str) -> Optional[str]:
+        try:
+            with open(self._body_path(url), encoding='utf-8') as f:
+                body = f.read()
+        except OSError:
+            return None
+        self._touch(url)
+        return body
+
+    def store_page(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        """Store a fetched body; returns True if it differs from the cached one"""
+        body_hash = content_hash(body)
+        with self._lock:
+            entry = self._index.get(url, {})
+            changed = entry.get('body_hash') != body_hash
+            if changed:
+                with open(self._body_path(url), 'w', encoding='utf-8') as f:
+                    f.write(body)
+            self._index[url] = {
+                **entry,
+                'etag': etag,
+                'last_modified': last_modified,
+                'body_hash': body_hash,
+                'size': len(body.encode('utf-8')),
+                'last_access': time.time(),
+            }
+            self._evict()
+            self._save_index()
+        return changed
+
+    def parsed_listings(self, url: str, text_hash: str, housing_type: str) -> Optional[List[Dict]]:
+        """Listings parsed from identical extracted text on a previous run, if any"""
+        entry = self.get(url)
+        if entry and entry.get('text_hash') == text_hash and entry.get('housing_type') == housing_type:
+            return entry.get('listings')
+        return None
+
+    def cached_listings(self, url: str, housing_type: str) -> Optional[List[Dict]]:
+        """Listings from the last parse of the cached body, for 304 / unchanged pages"""
+        entry = self.get(url)
+        if entry and entry.get('housing_type') == housing_type and entry.get('parsed_body_hash') == entry.get('body_hash'):
+            return entry.get('listings')
+        return None
+
+    def store_listings(self, url: str, text_hash: str, housing_type: str, listings: List[Dict]):
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None:
+                return
+            entry.update({
+                'text_hash': text_hash,
+                'housing_type': housing_type,
+                'parsed_body_hash': entry.get('body_hash'),
+                'listings': listings,
+            })
+            self._save_index()
+
+    def cached_urls(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.get('size', 0) for entry in self._index.values())
+
+    def _touch(self, url: str):
+        with self._lock:
+            if url in self._index:
+                self._index[url]['last_access'] = time.time()
+                self._save_index()
+
+    def _evict(self):
+        # Caller holds the lock
+        total = sum(entry.get('size', 0) for entry in self._index.values())
+        for url in sorted(self._index, key=lambda u: self._index[u].get('last_access', 0)):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[url].get('size', 0)
+            del self._index[url]
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
@@ -176,16 +176,10 @@ def populate_database():
     # Initialize tables
     db.init_tables()
     
-    # Clear existing data
-    db.clear_housing_data()
-    print("Cleared existing housing data")
-    
     # Add realistic off-campus data
     off_campus_data = generate_realistic_housing_data()
     print(f"Adding {len(off_campus_data)} off-campus housing options...")
     
-    db.bulk_insert_housing(off_campus_data)
-    
     # Keep the on-campus data
     on_campus_data = [
         {
@@ -239,7 +233,9 @@ def populate_database():
     ]
     
     print(f"Adding {len(on_campus_data)} on-campus housing options...")
-    db.bulk_insert_housing(on_campus_data)
+    
+    # Sync both sets in a single transaction; unchanged listings keep their ids
+    db.sync_housing(off_campus_data + on_campus_data)
     
     # Get final count
     total_housing = db.get_all_housing()
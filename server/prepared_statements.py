@@ -0,0 +1,104 @@
+"""
+Server-side prepared statements for the listing queries, per filter shape.
+
+The page and count queries are built from a fixed set of clauses, so the
+SQL text depends only on which filters are active (plus cursor and limit),
+never on their values. The registry maps each distinct SQL text (a shape)
+to a named statement with $n placeholders, PREPAREs it the first time it
+runs on a pooled connection and afterwards only sends
+EXECUTE name(values), so Postgres skips parsing and analysis and can
+reuse a generic plan once it has proven no worse than custom ones
+(plan_cache_mode).
+
+Prepared statements live in the backend session: they survive rollbacks
+and disappear with the connection, which is why state is tracked per
+connection object. They do not work behind a transaction-mode pooler such
+as PgBouncer; set HOUSING_PREPARED_STATEMENTS=0 there.
+"""
+
+import os
+import re
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+_PLACEHOLDER = re.compile(r'%\((\w+)\)s|%%')
+
+
+class PreparedStatements:
+    def __init__(self, max_statements: int = 256):
+        # Shapes beyond this run unprepared, bounding per-connection memory in Postgres
+        self.max_statements = max_statements
+        self._statements: Dict[str, Tuple[str, str, List[str]]] = {}
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = {
+            'prepares': 0,
+            'executions': 0,
+            'unprepared': 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> Optional['PreparedStatements']:
+        """Registry configured from HOUSING_PREPARED_* (on by default), or None when disabled"""
+        if os.getenv('HOUSING_PREPARED_STATEMENTS', '1').lower() in ('0', 'false', 'no'):
+            return None
+        return cls(max_statements=int(os.getenv('HOUSING_PREPARED_MAX_STATEMENTS', 256)))
+
+    def statement(self, operation: str, query: str) -> Optional[Tuple[str, str, List[str]]]:
+        """(name, PREPARE sql, parameter names in $n order) for a query, registering
+        it on first use; None once the registry is full"""
+        with self._lock:
+            statement = self._statements.get(query)
+            if statement is None and len(self._statements) < self.max_statements:
+                names: List[str] = []
+
+                def placeholder(match):
+                    if match.group(1) is None:
+                        return '%'
+                    if match.group(1) not in names:
+                        names.append(match.group(1))
+                    return f"${names.index(match.group(1)) + 1}"
+
+                # Numbered in registration order: unique per registry, where a hash
+                # of the SQL could collide
+                name = f"housing_{operation}_{len(self._statements) + 1}"
+                prepare_sql = f"PREPARE {name} AS {_PLACEHOLDER.sub(placeholder, query)}"
+                statement = self._statements[query] = (name, prepare_sql, names)
+            return statement
+
+    def bind(self, cur, operation: str, query: str, params: Optional[Dict]) -> Tuple[str, Optional[Dict]]:
+        """The EXECUTE for query on cur's connection, preparing it there first if needed.
+
+        Falls back to the query itself when the registry is full.
+        """
+        statement = self.statement(operation, query)
+        if statement is None:
+            with self._lock:
+                self._counters['unprepared'] += 1
+            return query, params
+
+        name, prepare_sql, names = statement
+        with self._lock:
+            prepared = self._prepared.setdefault(cur.connection, set())
+        # A connection is used by one thread at a time, so its set needs no lock
+        if name not in prepared:
+            cur.execute(prepare_sql)
+            prepared.add(name)
+            with self._lock:
+                self._counters['prepares'] += 1
+        with self._lock:
+            self._counters['executions'] += 1
+
+        if not names:
+            return f"EXECUTE {name}", None
+        return f"EXECUTE {name} ({', '.join(f'%({param})s' for param in names)})", params
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'statements': len(self._statements),
+                'max_statements': self.max_statements,
+                'connections': len(self._prepared),
+                **self._counters,
+            }
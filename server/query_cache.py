@@ -0,0 +1,105 @@
+"""
+In-process LRU cache with TTL for housing query results.
+
+Entries are tagged with the data version they were loaded under; a lookup
+with a newer version is a miss, so a bump of the shared version row in
+Postgres invalidates every worker's cache without any cross-process
+messaging. Cached values are shared between callers and must be treated as
+read-only.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def cache_key(name: str, filters: Optional[Dict] = None, **options) -> str:
+    """Build a stable key from a query name, its filters and any paging options.
+
+    Empty filter values are dropped and list values sorted, so equivalent
+    filter dicts share an entry.
+    """
+    normalized = {}
+    for key, value in (filters or {}).items():
+        if value is None or value == '' or value == []:
+            continue
+        normalized[key] = sorted(value) if isinstance(value, list) else value
+    return json.dumps([name, normalized, options], sort_keys=True, default=str)
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> 'QueryCache':
+        """Build a cache configured from HOUSING_CACHE_* environment variables"""
+        return cls(
+            max_entries=int(os.getenv('HOUSING_CACHE_SIZE', 256)),
+            ttl=float(os.getenv('HOUSING_CACHE_TTL', 60)),
+        )
+
+    def get(self, key: str, version: int) -> Tuple[bool, Any]:
+        """Return (found, value) for a key loaded under the given data version"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return False, None
+
+            expires_at, entry_version, value = entry
+            if entry_version != version:
+                del self._entries[key]
+                self._counters['invalidations'] += 1
+                self._counters['misses'] += 1
+                return False, None
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return True, value
+
+    def set(self, key: str, value: Any, version: int):
+        """Store a value, evicting the least recently used entries past max_entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._counters['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                **self._counters,
+                'hit_ratio': self._counters['hits'] / lookups if lookups else 0.0,
+            }
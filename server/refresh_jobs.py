@@ -0,0 +1,195 @@
+"""
+Background refresh jobs for the housing data.
+
+A refresh (scrape every source, then sync the listings into Postgres) can take
+minutes, so it runs on a worker thread and reports its progress through a job
+record the API can poll. Only one job runs per process at a time, and
+sync_housing's advisory lock keeps syncs from different processes apart.
+Cancelling a job stops fetches that have not started, skips parsing and rolls
+back a sync that has not committed yet. Sources that fail keep their stored
+listings; a run in which every off-campus source fails does not sync at all.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from database import HousingDatabase, SyncCancelled
+
+# A job moves through queued -> fetching -> parsing -> syncing and ends in one
+# of the terminal phases
+TERMINAL_PHASES = {'completed', 'failed', 'cancelled'}
+
+# Record errors kept per job, so one broken run cannot grow a job without bound
+MAX_JOB_ERRORS = 50
+
+
+class RefreshInProgress(Exception):
+    """Raised when a refresh is requested while another one is running"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Refresh {job_id} is already running")
+        self.job_id = job_id
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RefreshJob:
+    def __init__(self):
+        self.job_id = uuid.uuid4().hex
+        self.phase = 'queued'
+        self.created_at = _now()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.sources: Dict[str, Dict] = {}
+        self.listings_scraped = 0
+        self.rows: Optional[Dict] = None
+        self.errors: List[str] = []
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.phase in TERMINAL_PHASES
+
+    def set_phase(self, phase: str):
+        with self._lock:
+            self.phase = phase
+            if phase == 'fetching':
+                self.started_at = _now()
+            elif phase in TERMINAL_PHASES:
+                self.finished_at = _now()
+
+    def add_error(self, error: str):
+        with self._lock:
+            if len(self.errors) < MAX_JOB_ERRORS:
+                self.errors.append(error)
+
+    def source_progress(self, event: str, summary: Dict):
+        """Scraper progress callback: record a source's fetch or parse result"""
+        with self._lock:
+            if event == 'parsed' and self.phase == 'fetching':
+                self.phase = 'parsing'
+            self.sources[summary['url']] = {
+                'state': 'failed' if summary.get('error') else event,
+                'status': summary.get('status'),
+                'bytes': summary.get('bytes'),
+                'latency_ms': round(summary.get('latency_ms') or 0.0, 1),
+                'extract_ms': round(summary.get('extract_ms') or 0.0, 1),
+                'parse_ms': round(summary.get('parse_ms') or 0.0, 1),
+                'attempts': summary.get('attempts'),
+                'cache': summary.get('cache'),
+                'listings': summary.get('listings'),
+                'error': summary.get('error'),
+            }
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'phase': self.phase,
+                'done': self.done,
+                'cancel_requested': self.cancel_event.is_set(),
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'sources': [{'url': url, **progress} for url, progress in self.sources.items()],
+                'listings_scraped': self.listings_scraped,
+                'rows': self.rows,
+                'errors': list(self.errors),
+            }
+
+
+class RefreshJobManager:
+    def __init__(self, db: HousingDatabase, scraper_factory: Optional[Callable] = None, max_history: int = 20):
+        self.db = db
+        self.scraper_factory = scraper_factory
+        self.max_history = max_history
+        self._jobs: OrderedDict = OrderedDict()
+        self._current: Optional[RefreshJob] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> RefreshJob:
+        """Start a refresh on a worker thread; raises RefreshInProgress if one is running"""
+        with self._lock:
+            if self._current is not None and not self._current.done:
+                raise RefreshInProgress(self._current.job_id)
+
+            job = RefreshJob()
+            self._current = job
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_history:
+                self._jobs.popitem(last=False)
+
+            self._thread = threading.Thread(target=self._run, args=(job,), name='housing-refresh', daemon=True)
+            self._thread.start()
+            return job
+
+    def get(self, job_id: str) -> Optional[RefreshJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[RefreshJob]:
+        """Request cancellation; returns the job, or None if unknown"""
+        job = self.get(job_id)
+        if job is not None and not job.done:
+            job.cancel_event.set()
+        return job
+
+    def shutdown(self, timeout: float = 10.0):
+        """Cancel the running job and wait briefly for it to stop"""
+        with self._lock:
+            job, thread = self._current, self._thread
+        if job is not None and not job.done:
+            job.cancel_event.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _make_scraper(self):
+        if self.scraper_factory is not None:
+            return self.scraper_factory()
+        from housing_scraper import GainesvilleHousingScraper
+        return GainesvilleHousingScraper()
+
+    def _run(self, job: RefreshJob):
+        try:
+            job.set_phase('fetching')
+            scraper = self._make_scraper()
+            housing_data = scraper.scrape_all_housing(progress=job.source_progress, cancel_event=job.cancel_event)
+            for summary in scraper.last_run_summary:
+                if summary['error'] and summary['error'] != "Cancelled":
+                    job.add_error(f"{summary['url']}: {summary['error']}; stored listings kept")
+
+            if job.cancel_event.is_set():
+                job.set_phase('cancelled')
+                return
+
+            job.listings_scraped = len(housing_data)
+            # The built-in on-campus listings are always scraped, so the run is
+            # judged by its off-campus sources
+            if not scraper.synced_sources('off_campus'):
+                job.add_error("No off-campus source scraped successfully")
+                job.set_phase('failed')
+                return
+
+            job.set_phase('syncing')
+            # Only sources that came through may lose listings
+            report = self.db.sync_housing(housing_data, cancelled=job.cancel_event.is_set,
+                                          sources=scraper.synced_sources())
+            job.rows = {key: value for key, value in report.items() if key not in ('batches', 'errors')}
+            errors = report['errors'] + [error for batch in report['batches'] for error in batch['errors']]
+            for error in errors:
+                job.add_error(f"{error['name']}: {error['error']}")
+            job.set_phase('completed')
+
+        except SyncCancelled:
+            job.set_phase('cancelled')
+        except Exception as e:
+            print(f"Refresh {job.job_id} failed: {str(e)}")
+            job.add_error(str(e))
+            job.set_phase('failed')
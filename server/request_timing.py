@@ -0,0 +1,59 @@
+"""
+Per-request database timing.
+
+The API starts a RequestTiming for each request. Time spent holding a
+database connection on the request's behalf, including waiting for one from
+the pool, is added to it from whichever worker thread runs the query, and is
+reported back in a Server-Timing header:
+
+    Server-Timing: db;dur=3.12, app;dur=4.70
+
+Work done outside a request (refresh jobs, scripts) is not timed.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_db_time(self, seconds: float):
+        with self._lock:
+            self.db_seconds += seconds
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: database time and total time in the app"""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        return f"db;dur={self.db_seconds * 1000:.2f}, app;dur={total_ms:.2f}"
+
+
+_current: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar('request_timing', default=None)
+
+
+def start_request() -> RequestTiming:
+    """Begin timing the current request; worker threads see it through a copied context"""
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+
+@contextmanager
+def db_timer():
+    """Add the time spent inside the block to the current request, if any"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add_db_time(time.perf_counter() - started)
@@ -0,0 +1,88 @@
+"""
+Single-flight coalescing for identical concurrent queries.
+
+When many requests ask for the same thing at once (a burst after a refresh
+or a push notification), the first caller for a key runs the query and every
+caller that arrives while it is in flight waits for that result instead of
+running its own copy. Waiters get the leader's value, or its exception
+re-raised; a waiter that gives up after the timeout raises
+SingleFlightTimeout while the leader carries on. Nothing is remembered once
+a call completes; caching is the query cache's job.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a waiter when the shared in-flight call does not finish in time"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'leaders': 0,
+            'coalesced': 0,
+            'timeouts': 0,
+            'errors': 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> Optional['SingleFlight']:
+        """Coalescing configured from HOUSING_SINGLE_FLIGHT_* (on by default), or None when disabled"""
+        if os.getenv('HOUSING_SINGLE_FLIGHT', '1').lower() in ('0', 'false', 'no'):
+            return None
+        return cls(timeout=float(os.getenv('HOUSING_SINGLE_FLIGHT_TIMEOUT', 10)))
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn, or wait for the identical call already running under key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters['leaders'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if leader:
+            try:
+                call.value = fn()
+                return call.value
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self._counters['errors'] += 1
+                raise
+            finally:
+                # Unregister before waking waiters, so later callers start a fresh call
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if not call.done.wait(self.timeout):
+            with self._lock:
+                self._counters['timeouts'] += 1
+            raise SingleFlightTimeout(f"Timed out after {self.timeout}s waiting for an identical in-flight query")
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'timeout': self.timeout,
+                'in_flight': len(self._calls),
+                **self._counters,
+            }
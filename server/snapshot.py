@@ -0,0 +1,443 @@
+"""
+In-process columnar snapshot of the housing table.
+
+An optional serving mode (HOUSING_SNAPSHOT=1) for the small, read-heavy
+listing table: the whole table is loaded into column arrays once per data
+version, and list/stats filters are evaluated as vectorized NumPy masks
+instead of Postgres queries.
+
+  - sort keys (price, rating, member count, created_at in microseconds, id)
+    and coordinates: float/int arrays (NaN for NULL)
+  - housing type: small integer codes; international flag: -1/0/1 (NULL/false/true)
+  - amenities: one bitset row per listing over the amenity vocabulary
+  - full-text search: an inverted index from the search_vector lexemes
+    Postgres computed, so matching follows the same stemming
+
+Rows are kept in LIST_ORDER, so an unsorted filter is already in list order;
+other sort orders are a lexsort of the matching positions.
+Before each read the store checks the shared data version (the same polled
+version row the query cache uses) and loads a new snapshot when it changes;
+readers hold a reference to an immutable snapshot, so a reload swaps it
+atomically and never mixes versions.
+
+Queries the snapshot cannot answer exactly fall back to SQL: ranked
+full-text pages (ts_rank ordering is not reproduced) and ILIKE searches
+containing LIKE wildcards.
+
+NumPy is an optional dependency; without it the mode stays off. It is only
+imported when a store is created, so importing this module (as the API
+always does) stays cheap with the mode off.
+"""
+
+import bisect
+import math
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from amenities import normalize_amenities
+from database import (LIST_ORDER, SELECT_COLUMNS, HousingDatabase, decode_cursor, encode_cursor, facet_result,
+                      list_order, prefix_tsquery)
+from geocoding import EARTH_RADIUS_MILES
+
+# Set by load_numpy()
+np = None
+
+# Normalized prefix terms in to_tsquery output, e.g. 'pool':* & 'gym':*
+TSQUERY_TERM = re.compile(r"'((?:[^']|'')*)':\*")
+
+
+def load_numpy():
+    """Import NumPy for this module on first use; None when it is not installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # optional; snapshot serving is disabled without it
+            return None
+        np = numpy
+    return np
+
+
+class SnapshotUnsupported(Exception):
+    """Raised for queries the snapshot cannot answer identically to SQL"""
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _float_column(values: List) -> 'np.ndarray':
+    return np.array([math.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+
+def _microseconds(value: datetime) -> float:
+    """A naive timestamp as microseconds since the epoch; exact in a float64 until year 2255"""
+    return float((value - _EPOCH) // timedelta(microseconds=1))
+
+
+def _cursor_timestamp(value) -> float:
+    """A created_at cursor value (ISO text from encode_cursor) as _microseconds"""
+    try:
+        return _microseconds(datetime.fromisoformat(value))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+class HousingSnapshot:
+    """Immutable columnar copy of the housing table at one data version"""
+
+    def __init__(self, rows: List[Dict], version: int):
+        """rows must be in LIST_ORDER and carry a 'lexemes' list (tsvector_to_array(search_vector))"""
+        self.version = version
+        self.rows = [{key: value for key, value in row.items() if key != 'lexemes'} for row in rows]
+        count = len(rows)
+
+        self.ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        self.columns = {
+            'id': self.ids.astype(np.float64),
+            'rating': _float_column([row['rating'] for row in rows]),
+            'avg_price': _float_column([row['avg_price'] for row in rows]),
+            'member_count': _float_column([row['member_count'] for row in rows]),
+            'created_at': _float_column([None if row['created_at'] is None else _microseconds(row['created_at'])
+                                         for row in rows]),
+        }
+        self.latitude = _float_column([row['latitude'] for row in rows])
+        self.longitude = _float_column([row['longitude'] for row in rows])
+
+        self.type_codes = {value: code for code, value in enumerate(sorted({row['housing_type'] for row in rows}))}
+        self.housing_type = np.array([self.type_codes[row['housing_type']] for row in rows], dtype=np.int16)
+        self.international = np.array(
+            [-1 if row['is_international_friendly'] is None else int(row['is_international_friendly']) for row in rows],
+            dtype=np.int8
+        )
+
+        # Amenity bitsets: bit j of row i is set when listing i has amenity j
+        vocabulary = sorted({amenity for row in rows for amenity in row['amenities'] or []})
+        self.amenity_bits = {amenity: position for position, amenity in enumerate(vocabulary)}
+        self.amenity_words = max(1, (len(vocabulary) + 63) // 64)
+        self.amenities = np.zeros((count, self.amenity_words), dtype=np.uint64)
+        self.has_amenities = np.array([row['amenities'] is not None for row in rows], dtype=bool)
+        for index, row in enumerate(rows):
+            for amenity in row['amenities'] or []:
+                bit = self.amenity_bits[amenity]
+                self.amenities[index, bit // 64] |= np.uint64(1 << (bit % 64))
+
+        # Inverted index over search_vector lexemes, with a sorted vocabulary for prefix lookups
+        postings: Dict[str, List[int]] = {}
+        for index, row in enumerate(rows):
+            for lexeme in row['lexemes'] or []:
+                postings.setdefault(lexeme, []).append(index)
+        self.lexemes = sorted(postings)
+        self.postings = {lexeme: np.array(positions, dtype=np.int64) for lexeme, positions in postings.items()}
+
+        # ILIKE fallback text; \x00 keeps a match from spanning two fields
+        self.search_text = [
+            '\x00'.join((row[field] or '').lower() for field in ('name', 'location', 'description'))
+            for row in rows
+        ]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _amenity_mask(self, amenities: List[str], match_all: bool) -> 'np.ndarray':
+        if match_all and any(amenity not in self.amenity_bits for amenity in amenities):
+            return np.zeros(len(self), dtype=bool)
+
+        query = np.zeros(self.amenity_words, dtype=np.uint64)
+        for amenity in amenities:
+            bit = self.amenity_bits.get(amenity)
+            if bit is not None:
+                query[bit // 64] |= np.uint64(1 << (bit % 64))
+
+        overlap = self.amenities & query
+        if match_all:
+            return self.has_amenities & (overlap == query).all(axis=1)
+        return overlap.any(axis=1)
+
+    def _prefix_mask(self, prefix: str) -> 'np.ndarray':
+        mask = np.zeros(len(self), dtype=bool)
+        start = bisect.bisect_left(self.lexemes, prefix)
+        for lexeme in self.lexemes[start:]:
+            if not lexeme.startswith(prefix):
+                break
+            mask[self.postings[lexeme]] = True
+        return mask
+
+    def distances(self, lat: float, lon: float) -> 'np.ndarray':
+        """Haversine miles from a point, NaN for listings without coordinates"""
+        lat1, lon1 = math.radians(lat), math.radians(lon)
+        lat2, lon2 = np.radians(self.latitude), np.radians(self.longitude)
+        h = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(h))
+
+    def filter_mask(self, filters: Optional[Dict], search_lexemes: Callable[[str], List[str]]) -> 'np.ndarray':
+        """Rows matching filters, mirroring HousingDatabase._build_filters"""
+        mask = np.ones(len(self), dtype=bool)
+        if not filters:
+            return mask
+
+        if filters.get('housing_type'):
+            code = self.type_codes.get(filters['housing_type'])
+            mask &= self.housing_type == code if code is not None else False
+
+        if 'international_friendly' in filters:
+            mask &= self.international == int(bool(filters['international_friendly']))
+
+        # NaN compares False, like NULL in SQL
+        if filters.get('max_price'):
+            mask &= self.columns['avg_price'] <= filters['max_price']
+        if filters.get('min_price'):
+            mask &= self.columns['avg_price'] >= filters['min_price']
+
+        if filters.get('id'):
+            mask &= self.ids == filters['id']
+
+        if filters.get('search'):
+            tsquery = prefix_tsquery(filters['search'])
+            if tsquery and filters.get('search_mode', 'fts') == 'fts':
+                # Postgres normalizes the terms (stemming, stop words); an empty
+                # query matches nothing, as in SQL
+                prefixes = search_lexemes(tsquery)
+                if not prefixes:
+                    mask &= False
+                for prefix in prefixes:
+                    mask &= self._prefix_mask(prefix)
+            else:
+                term = filters['search'].lower()
+                if any(char in term for char in '%_\\'):
+                    raise SnapshotUnsupported("LIKE wildcards in search")
+                mask &= np.fromiter((term in text for text in self.search_text), dtype=bool, count=len(self))
+
+        if filters.get('near') and filters.get('radius'):
+            mask &= self.distances(*filters['near']) <= filters['radius']
+        elif not filters.get('near') and (filters.get('radius') or filters.get('sort') == 'distance'):
+            raise ValueError("radius and sort=distance require near")
+
+        if filters.get('amenities'):
+            amenity_list = filters['amenities'] if isinstance(filters['amenities'], list) else [filters['amenities']]
+            mask &= self._amenity_mask(normalize_amenities(amenity_list), filters.get('amenity_match') == 'all')
+
+        return mask
+
+    def _after_mask(self, order: List[tuple], values: List, columns: Dict[str, 'np.ndarray']) -> 'np.ndarray':
+        """Vectorized _keyset_predicate: rows sorting after the cursor row"""
+        after = np.zeros(len(self), dtype=bool)
+        equal = np.ones(len(self), dtype=bool)
+
+        for (name, direction), value in zip(order, values):
+            column = columns[name]
+            is_null = np.isnan(column)
+            if value is None:
+                branch = np.zeros(len(self), dtype=bool) if direction == 'ASC' else ~is_null
+                same = is_null
+            elif direction == 'ASC':
+                branch = (column > value) | is_null
+                same = column == value
+            else:
+                branch = column < value
+                same = column == value
+            after |= equal & branch
+            equal &= same
+
+        return after
+
+    def _sort_keys(self, order: List[tuple], columns: Dict[str, 'np.ndarray'], positions: 'np.ndarray') -> tuple:
+        """np.lexsort keys (least significant first) for order; NULLs sort last
+        ascending and first descending, as in Postgres"""
+        keys = []
+        for name, direction in order:
+            values = columns[name][positions]
+            if direction == 'ASC':
+                keys.append(np.nan_to_num(values, nan=np.inf))
+            else:
+                keys.append(np.nan_to_num(-values, nan=-np.inf))
+        return tuple(reversed(keys))
+
+    def page(self, filters: Optional[Dict], limit: Optional[int], cursor: Optional[str], total: str,
+             search_lexemes: Callable[[str], List[str]]) -> Dict:
+        """Same result as HousingDatabase._query_housing_page, computed from the snapshot"""
+        order = list_order(filters)
+        if order[0][0] == 'search_rank':
+            raise SnapshotUnsupported("ranked full-text search")
+
+        mask = self.filter_mask(filters, search_lexemes)
+        columns = self.columns
+        distance = None
+        if filters and filters.get('near'):
+            distance = self.distances(*filters['near'])
+            columns = {**columns, 'distance': distance}
+
+        count = int(mask.sum())
+        if cursor:
+            values = decode_cursor(cursor, len(order))
+            values = [_cursor_timestamp(value) if name == 'created_at' and value is not None else value
+                      for (name, _), value in zip(order, values)]
+            mask &= self._after_mask(order, values, columns)
+
+        positions = np.flatnonzero(mask)
+        if order is not LIST_ORDER:
+            positions = positions[np.lexsort(self._sort_keys(order, columns, positions))]
+
+        has_more = limit is not None and len(positions) > limit
+        if has_more:
+            positions = positions[:limit]
+        rows = []
+        for position in positions.tolist():
+            row = self.rows[position]
+            if distance is not None:
+                value = distance[position]
+                row = {**row, 'distance': None if math.isnan(value) else float(value)}
+            rows.append(row)
+        return {
+            'rows': rows,
+            'next_cursor': encode_cursor([rows[-1][column] for column, _ in order]) if has_more else None,
+            'total': count if total != 'none' else None,
+            # Counting the snapshot is exact and cheap, so no estimate is needed
+            'total_is_estimate': False
+        }
+
+    def stats(self, filters: Optional[Dict], search_lexemes: Callable[[str], List[str]]) -> Dict:
+        """Same result as HousingDatabase._query_housing_stats"""
+        mask = self.filter_mask(filters, search_lexemes)
+        prices = self.columns['avg_price'][mask]
+        prices = prices[~np.isnan(prices)]
+        on_campus = self.type_codes.get('on_campus')
+        off_campus = self.type_codes.get('off_campus')
+
+        return {
+            'total_listings': int(mask.sum()),
+            'on_campus_count': int((mask & (self.housing_type == on_campus)).sum()) if on_campus is not None else 0,
+            'off_campus_count': int((mask & (self.housing_type == off_campus)).sum()) if off_campus is not None else 0,
+            'international_friendly_count': int((mask & (self.international == 1)).sum()),
+            'price_range': {
+                'min': int(prices.min()) if len(prices) else 0,
+                'max': int(prices.max()) if len(prices) else 0,
+                'avg': int(math.floor(prices.mean())) if len(prices) else 0
+            }
+        }
+
+    def facets(self, filters: Optional[Dict], search_lexemes: Callable[[str], List[str]], bounds: List[int]) -> Dict:
+        """Same result as HousingDatabase._query_housing_facets"""
+        mask = self.filter_mask(filters, search_lexemes)
+        type_counts = np.bincount(self.housing_type[mask], minlength=len(self.type_codes))
+        international = self.international[mask]
+
+        # Per-amenity counts: unpack the matching rows' bitsets (little-endian
+        # words) into one column per bit and sum the columns
+        bits = np.unpackbits(self.amenities[mask].view(np.uint8), axis=1, bitorder='little')
+        amenity_counts = bits.sum(axis=0)
+
+        prices = self.columns['avg_price'][mask]
+        buckets = np.searchsorted(np.array(bounds, dtype=np.float64), prices[~np.isnan(prices)], side='right')
+        price_counts = np.bincount(buckets, minlength=len(bounds) + 1)
+
+        return facet_result(
+            int(mask.sum()),
+            {value: int(type_counts[code]) for value, code in self.type_codes.items() if type_counts[code]},
+            {'true': int((international == 1).sum()), 'false': int((international == 0).sum())},
+            {amenity: int(amenity_counts[bit]) for amenity, bit in self.amenity_bits.items() if amenity_counts[bit]},
+            {index: int(count) for index, count in enumerate(price_counts) if count},
+            bounds
+        )
+
+
+class SnapshotStore:
+    """Holds the current snapshot and swaps in a new one when the data version changes"""
+
+    def __init__(self, max_search_terms: int = 1024):
+        if load_numpy() is None:
+            raise RuntimeError("Snapshot serving requires numpy")
+        self.max_search_terms = max_search_terms
+        self._snapshot: Optional[HousingSnapshot] = None
+        self._lock = threading.Lock()
+        self._search_terms: Dict[str, List[str]] = {}
+        self._counters = {'loads': 0, 'served': 0, 'fallbacks': 0}
+
+    @classmethod
+    def from_env(cls) -> Optional['SnapshotStore']:
+        """A store when HOUSING_SNAPSHOT is enabled and NumPy is installed, else None"""
+        if os.getenv('HOUSING_SNAPSHOT', '').lower() not in ('1', 'true', 'yes'):
+            return None
+        if load_numpy() is None:
+            print("HOUSING_SNAPSHOT is set but numpy is not installed; serving from Postgres")
+            return None
+        return cls()
+
+    def snapshot(self, db: HousingDatabase) -> HousingSnapshot:
+        """Snapshot for the current data version, loading it (once, under a lock) if needed"""
+        version = db.data_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._load(db, version)
+                self._snapshot = snapshot
+                self._counters['loads'] += 1
+            return snapshot
+
+    def _load(self, db: HousingDatabase, version: int) -> HousingSnapshot:
+        order = ", ".join(f"{column} {direction}" for column, direction in LIST_ORDER)
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT {SELECT_COLUMNS}, tsvector_to_array(search_vector) AS lexemes "
+                            f"FROM housing ORDER BY {order}")
+                rows = cur.fetchall()
+        return HousingSnapshot(rows, version)
+
+    def _search_lexemes(self, db: HousingDatabase, tsquery: str) -> List[str]:
+        """Prefix terms of a tsquery after Postgres normalization, memoized per query"""
+        terms = self._search_terms.get(tsquery)
+        if terms is None:
+            with db.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_tsquery('english', %s)::text AS normalized", (tsquery,))
+                    normalized = cur.fetchone()['normalized']
+            terms = [term.replace("''", "'") for term in TSQUERY_TERM.findall(normalized)]
+            if len(self._search_terms) >= self.max_search_terms:
+                self._search_terms.clear()
+            self._search_terms[tsquery] = terms
+        return terms
+
+    def page(self, db: HousingDatabase, filters: Optional[Dict], limit: Optional[int],
+             cursor: Optional[str], total: str) -> Optional[Dict]:
+        """A page served from the snapshot, or None when the query needs SQL"""
+        try:
+            page = self.snapshot(db).page(filters, limit, cursor, total, lambda q: self._search_lexemes(db, q))
+        except SnapshotUnsupported:
+            self._counters['fallbacks'] += 1
+            return None
+        self._counters['served'] += 1
+        return page
+
+    def housing_stats(self, db: HousingDatabase, filters: Optional[Dict]) -> Optional[Dict]:
+        """Stats served from the snapshot, or None when the query needs SQL"""
+        try:
+            stats = self.snapshot(db).stats(filters, lambda q: self._search_lexemes(db, q))
+        except SnapshotUnsupported:
+            self._counters['fallbacks'] += 1
+            return None
+        self._counters['served'] += 1
+        return stats
+
+    def housing_facets(self, db: HousingDatabase, filters: Optional[Dict], bounds: List[int]) -> Optional[Dict]:
+        """Facet counts served from the snapshot, or None when the query needs SQL"""
+        try:
+            facets = self.snapshot(db).facets(filters, lambda q: self._search_lexemes(db, q), bounds)
+        except SnapshotUnsupported:
+            self._counters['fallbacks'] += 1
+            return None
+        self._counters['served'] += 1
+        return facets
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot else None,
+            'rows': len(snapshot) if snapshot else 0,
+            **self._counters,
+        }